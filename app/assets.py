@@ -0,0 +1,173 @@
+# Quản lý file tĩnh: URL có hash nội dung, file nén sẵn và cache dài hạn
+# Build file nén sẵn (.gz, .br) trước khi deploy:
+#     python -m app.assets
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+from app.middleware import brotli, parse_accept_encoding
+
+STATIC_DIR = "app/static"
+STATIC_URL = "/static"
+
+# URL có hash đổi mỗi khi nội dung file đổi, nên trình duyệt cache vĩnh viễn
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+ASSET_HASH_LENGTH = 10
+
+# Các loại file đáng nén sẵn và kích thước tối thiểu (byte)
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".html", ".map")
+PRECOMPRESS_MIN_SIZE = 1024
+# Thứ tự ưu tiên khi client chấp nhận nhiều encoding
+PRECOMPRESSED_VARIANTS = (("br", ".br"), ("gzip", ".gz"))
+
+# style.0123456789.css -> style.css
+_HASHED_NAME_RE = re.compile(
+    r"^(?P<name>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[^./\\]+)$" % ASSET_HASH_LENGTH
+)
+
+# Cache hash theo đường dẫn, kèm mtime và size để tự tính lại khi file đổi
+_hash_cache: Dict[str, Tuple[int, int, str]] = {}
+_hash_lock = threading.Lock()
+
+def asset_hash(path: str, directory: str = STATIC_DIR) -> Optional[str]:
+    """
+    Hash nội dung của một file tĩnh (None nếu file không tồn tại)
+    """
+    full_path = os.path.join(directory, path)
+    try:
+        stat_result = os.stat(full_path)
+    except OSError:
+        return None
+    key = (stat_result.st_mtime_ns, stat_result.st_size)
+    cached = _hash_cache.get(full_path)
+    if cached and cached[:2] == key:
+        return cached[2]
+
+    with open(full_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:ASSET_HASH_LENGTH]
+    with _hash_lock:
+        _hash_cache[full_path] = (*key, digest)
+    return digest
+
+def asset_url(path: str) -> str:
+    """
+    URL của file tĩnh có gắn hash nội dung, dùng trong template:
+    {{ asset_url('css/style.css') }} -> /static/css/style.<hash>.css
+    """
+    path = path.lstrip("/")
+    digest = asset_hash(path)
+    if digest is None:
+        return f"{STATIC_URL}/{path}"
+    name, ext = os.path.splitext(path)
+    return f"{STATIC_URL}/{name}.{digest}{ext}"
+
+class AssetStaticFiles(StaticFiles):
+    """
+    StaticFiles phục vụ URL có hash (cache immutable) và file nén sẵn
+    (.br / .gz) theo Accept-Encoding của client
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        immutable = False
+        match = _HASHED_NAME_RE.match(path)
+        if match:
+            original = match["name"] + match["ext"]
+            digest = await anyio.to_thread.run_sync(asset_hash, original, self.directory)
+            if digest is not None:
+                # Hash cũ (trang HTML cũ) vẫn nhận nội dung mới nhưng không cache vĩnh viễn
+                path, immutable = original, digest == match["hash"]
+
+        response = None
+        if scope["method"] in ("GET", "HEAD"):
+            response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        if immutable:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    async def _precompressed_response(self, path: str, scope: Scope) -> Optional[Response]:
+        """
+        Trả về file nén sẵn nếu client chấp nhận và file nén không cũ hơn file gốc
+        """
+        accepted = parse_accept_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if not accepted:
+            return None
+
+        _, original_stat = await anyio.to_thread.run_sync(self.lookup_path, path)
+        if original_stat is None or not stat.S_ISREG(original_stat.st_mode):
+            return None
+
+        for encoding, suffix in PRECOMPRESSED_VARIANTS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                continue
+            if stat_result.st_mtime < original_stat.st_mtime:
+                continue
+
+            response = self.file_response(full_path, stat_result, scope)
+            if response.status_code == 200:
+                media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                if media_type.startswith("text/"):
+                    media_type += "; charset=utf-8"
+                response.headers["Content-Type"] = media_type
+            response.headers["Content-Encoding"] = encoding
+            response.headers.add_vary_header("Accept-Encoding")
+            return response
+        return None
+
+def build_precompressed(directory: str = STATIC_DIR, min_size: int = PRECOMPRESS_MIN_SIZE) -> List[dict]:
+    """
+    Tạo file .gz (và .br nếu đã cài brotli) cạnh mỗi file tĩnh nén được
+    Chỉ giữ bản nén nếu nhỏ hơn file gốc
+    """
+    results = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            full_path = os.path.join(root, name)
+            with open(full_path, "rb") as f:
+                data = f.read()
+            if len(data) < min_size:
+                continue
+
+            # mtime=0 để bản build giống hệt nhau giữa các lần chạy
+            variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants[".br"] = brotli.compress(data, quality=11)
+
+            result = {"path": os.path.relpath(full_path, directory), "size": len(data)}
+            for suffix, compressed in variants.items():
+                variant_path = full_path + suffix
+                if len(compressed) >= len(data):
+                    if os.path.exists(variant_path):
+                        os.remove(variant_path)
+                    continue
+                with open(variant_path, "wb") as f:
+                    f.write(compressed)
+                result[suffix.lstrip(".")] = len(compressed)
+            results.append(result)
+    return results
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else STATIC_DIR
+    if brotli is None:
+        print("Chưa cài brotli: chỉ tạo file .gz")
+    for result in build_precompressed(directory):
+        print(
+            f"{result['path']}: {result['size']} byte"
+            f" -> gz {result.get('gz', '-')}, br {result.get('br', '-')}"
+        )
@@ -3,21 +3,25 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from app.database import get_db
+from starlette.concurrency import run_in_threadpool
+from app.database import get_db, SessionLocal
 from app.models import User
 from app.schemas import UserCreate, User as UserSchema, Token
 from app.utils.auth import (
-    get_password_hash, 
-    authenticate_user, 
+    get_password_hash_async, 
+    authenticate_user_async, 
     create_access_token,
     get_current_active_user,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from app.utils.password_pool import PasswordHashPoolBusy
+from app.templating import templates
+
+# Thông báo khi pool bcrypt quá tải
+BUSY_MESSAGE = "Hệ thống đang bận, vui lòng thử lại sau giây lát"
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
@@ -26,49 +30,63 @@ async def register_page(request: Request):
     """
     return templates.TemplateResponse("auth/register.html", {"request": request})
 
+def _registration_error(username: str, email: str):
+    """
+    Thông báo lỗi nếu username / email đã được dùng (None nếu hợp lệ)
+    """
+    with SessionLocal() as db:
+        # Kiểm tra username đã tồn tại
+        if db.query(User.id).filter(User.username == username).first():
+            return "Tên đăng nhập đã tồn tại"
+        # Kiểm tra email đã tồn tại
+        if db.query(User.id).filter(User.email == email).first():
+            return "Email đã được sử dụng"
+    return None
+
+def _create_user(username: str, email: str, hashed_password: str, full_name: str) -> None:
+    with SessionLocal() as db:
+        db.add(User(
+            username=username,
+            email=email,
+            hashed_password=hashed_password,
+            full_name=full_name
+        ))
+        db.commit()
+
 @router.post("/register")
 async def register_user(
     request: Request,
     username: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
-    full_name: str = Form(None),
-    db: Session = Depends(get_db)
+    full_name: str = Form(None)
 ):
     """
     Xử lý đăng ký người dùng mới
+    Handler async: query chạy trong threadpool với session riêng (đóng ngay sau đó),
+    bcrypt được chờ bằng await nên không giữ thread lẫn kết nối database
     """
     try:
-        # Kiểm tra username đã tồn tại
-        db_user = db.query(User).filter(User.username == username).first()
-        if db_user:
-            return templates.TemplateResponse(
-                "auth/register.html", 
-                {"request": request, "error": "Tên đăng nhập đã tồn tại"}
-            )
-        
-        # Kiểm tra email đã tồn tại
-        db_user = db.query(User).filter(User.email == email).first()
-        if db_user:
+        error = await run_in_threadpool(_registration_error, username, email)
+        if error:
             return templates.TemplateResponse(
                 "auth/register.html", 
-                {"request": request, "error": "Email đã được sử dụng"}
+                {"request": request, "error": error}
             )
         
         # Tạo user mới
-        hashed_password = get_password_hash(password)
-        db_user = User(
-            username=username,
-            email=email,
-            hashed_password=hashed_password,
-            full_name=full_name
-        )
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        hashed_password = await get_password_hash_async(password)
+        await run_in_threadpool(_create_user, username, email, hashed_password, full_name)
         
         return RedirectResponse(url="/login?message=Đăng ký thành công", status_code=303)
         
+    except PasswordHashPoolBusy:
+        return templates.TemplateResponse(
+            "auth/register.html", 
+            {"request": request, "error": BUSY_MESSAGE},
+            status_code=503,
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         return templates.TemplateResponse(
             "auth/register.html", 
@@ -89,13 +107,20 @@ async def login_page(request: Request, message: str = None):
 async def login_user(
     request: Request,
     username: str = Form(...),
-    password: str = Form(...),
-    db: Session = Depends(get_db)
+    password: str = Form(...)
 ):
     """
     Xử lý đăng nhập người dùng
     """
-    user = authenticate_user(db, username, password)
+    try:
+        user = await authenticate_user_async(username, password)
+    except PasswordHashPoolBusy:
+        return templates.TemplateResponse(
+            "auth/login.html", 
+            {"request": request, "error": BUSY_MESSAGE},
+            status_code=503,
+            headers={"Retry-After": "1"}
+        )
     if not user:
         return templates.TemplateResponse(
             "auth/login.html", 
@@ -119,13 +144,19 @@ async def login_user(
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
-    form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """
     API endpoint tạo access token (cho OAuth2)
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    try:
+        user = await authenticate_user_async(form_data.username, form_data.password)
+    except PasswordHashPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password hashing pool is busy",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -148,14 +179,14 @@ async def logout():
     return response
 
 @router.get("/profile", response_class=HTMLResponse)
-async def profile_page(
+def profile_page(
     request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Hiển thị trang hồ sơ người dùng
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     return templates.TemplateResponse(
         "auth/profile.html", 
         {"request": request, "user": current_user}
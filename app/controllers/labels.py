@@ -1,48 +1,53 @@
 # Controller xử lý Label (nhãn công việc)
 from fastapi import APIRouter, Depends, HTTPException, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
-from app.models import Label, User
-from app.schemas import LabelCreate, Label as LabelSchema
+from app.models import Label, Task, User
+from app.schemas import LabelCreate, Label as LabelSchema, LabelWithCounts
 from app.utils.auth import get_current_active_user
+from app.utils.refdata import invalidate_user_refdata
+from app.utils.etag import bump_data_version, check_not_modified, etag_headers
+from app.utils.stats import count_tasks_by, empty_task_counts
+from app.templating import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/labels", response_class=HTMLResponse)
-async def list_labels(
+def list_labels(
     request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Hiển thị danh sách tất cả label của user
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     labels = db.query(Label).filter(Label.user_id == current_user.id).all()
+    # Đếm task theo label bằng một câu GROUP BY thay vì nạp label.tasks
+    counts = count_tasks_by(db, current_user.id, Task.label_id)
+    task_counts = {label.id: counts.get(label.id, empty_task_counts()) for label in labels}
     return templates.TemplateResponse(
         "labels/list.html", 
-        {"request": request, "labels": labels, "user": current_user}
+        {"request": request, "labels": labels, "task_counts": task_counts, "user": current_user}
     )
 
 @router.get("/labels/create", response_class=HTMLResponse)
-async def create_label_page(
+def create_label_page(
     request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Hiển thị trang tạo label mới
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     return templates.TemplateResponse(
         "labels/create.html", 
         {"request": request, "user": current_user}
     )
 
 @router.post("/labels/create")
-async def create_label(
+def create_label(
     request: Request,
     name: str = Form(...),
     color: str = Form("#FF6B6B"),
@@ -51,7 +56,7 @@ async def create_label(
     """
     Tạo label mới
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     try:
         # Kiểm tra tên label đã tồn tại cho user này
         existing_label = db.query(Label).filter(
@@ -73,6 +78,8 @@ async def create_label(
         )
         db.add(db_label)
         db.commit()
+        invalidate_user_refdata(current_user.id)
+        bump_data_version(current_user.id)
         db.refresh(db_label)
         
         return RedirectResponse(url="/labels?message=Tạo nhãn thành công", status_code=303)
@@ -84,7 +91,7 @@ async def create_label(
         )
 
 @router.get("/labels/{label_id}/edit", response_class=HTMLResponse)
-async def edit_label_page(
+def edit_label_page(
     label_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -92,7 +99,7 @@ async def edit_label_page(
     """
     Hiển thị trang chỉnh sửa label
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     label = db.query(Label).filter(
         Label.id == label_id,
         Label.user_id == current_user.id
@@ -107,7 +114,7 @@ async def edit_label_page(
     )
 
 @router.post("/labels/{label_id}/edit")
-async def update_label(
+def update_label(
     label_id: int,
     request: Request,
     name: str = Form(...),
@@ -117,7 +124,7 @@ async def update_label(
     """
     Cập nhật thông tin label
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     try:
         label = db.query(Label).filter(
             Label.id == label_id,
@@ -149,6 +156,8 @@ async def update_label(
         label.name = name
         label.color = color
         db.commit()
+        invalidate_user_refdata(current_user.id)
+        bump_data_version(current_user.id)
         
         return RedirectResponse(url="/labels?message=Cập nhật nhãn thành công", status_code=303)
         
@@ -164,7 +173,7 @@ async def update_label(
         )
 
 @router.post("/labels/{label_id}/delete")
-async def delete_label(
+def delete_label(
     label_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -172,7 +181,7 @@ async def delete_label(
     """
     Xóa label
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     label = db.query(Label).filter(
         Label.id == label_id,
         Label.user_id == current_user.id
@@ -184,18 +193,32 @@ async def delete_label(
     # Xóa label (các task sẽ có label_id = null)
     db.delete(label)
     db.commit()
+    invalidate_user_refdata(current_user.id)
+    bump_data_version(current_user.id)
     
     return RedirectResponse(url="/labels?message=Xóa nhãn thành công", status_code=303)
 
 # API endpoints
-@router.get("/api/labels", response_model=List[LabelSchema])
-async def get_labels_api(
+@router.get("/api/labels", response_model=List[LabelWithCounts])
+def get_labels_api(
     request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     API lấy danh sách label của user
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
+    not_modified = check_not_modified(request, current_user.id)
+    if not_modified:
+        return not_modified
+    response.headers.update(etag_headers(request, current_user.id))
     labels = db.query(Label).filter(Label.user_id == current_user.id).all()
-    return labels
\ No newline at end of file
+    counts = count_tasks_by(db, current_user.id, Task.label_id)
+    return [
+        LabelWithCounts(
+            **LabelSchema.model_validate(label).model_dump(),
+            task_counts=counts.get(label.id, empty_task_counts())
+        )
+        for label in labels
+    ]
\ No newline at end of file
@@ -1,66 +1,48 @@
 # Controller xử lý Notification (thông báo nhắc việc)
+import asyncio
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from datetime import datetime, date, timedelta
+from fastapi.responses import HTMLResponse, StreamingResponse
+from sqlalchemy.orm import Session, joinedload
+from datetime import datetime, date
 from app.database import get_db
 from app.models import Task, User
 from app.utils.auth import get_current_active_user
+from app.utils.stats import get_task_stats
+from app.utils.etag import check_not_modified, etag_headers
+from app.utils.events import reminder_broker, EVENTS_KEEPALIVE_SECONDS
+from app.utils.reminders import get_reminder_buckets, LONG_OVERDUE_DAYS, UPCOMING_DAYS
+from app.templating import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+
+# Nạp sẵn subject và label cùng task để template không phát sinh N+1 query
+TASK_LIST_OPTIONS = (joinedload(Task.subject), joinedload(Task.label))
 
 @router.get("/notifications", response_class=HTMLResponse)
-async def notifications_page(
+def notifications_page(
     request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Hiển thị trang thông báo nhắc việc
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     today = date.today()
     now = datetime.now()
-    three_days_ago = now - timedelta(days=3)
-    
-    # Lấy task đến hạn hôm nay
-    due_today_tasks = db.query(Task).filter(
-        and_(
-            Task.user_id == current_user.id,
-            Task.status == "todo",
-            Task.due_date >= today,
-            Task.due_date < today + timedelta(days=1)
-        )
-    ).order_by(Task.due_date.asc()).all()
     
-    # Lấy task quá hạn >= 3 ngày
-    overdue_tasks = db.query(Task).filter(
-        and_(
-            Task.user_id == current_user.id,
-            Task.status == "todo",
-            Task.due_date < three_days_ago
-        )
-    ).order_by(Task.due_date.asc()).all()
-    
-    # Lấy task quá hạn < 3 ngày (để hiển thị riêng)
-    recent_overdue_tasks = db.query(Task).filter(
-        and_(
-            Task.user_id == current_user.id,
-            Task.status == "todo",
-            Task.due_date < now,
-            Task.due_date >= three_days_ago
-        )
-    ).order_by(Task.due_date.asc()).all()
+    # Một lần quét các task chưa xong có hạn chót, chia nhóm trong Python
+    buckets = get_reminder_buckets(db, current_user.id, now)
     
     return templates.TemplateResponse(
         "notifications/index.html", 
         {
             "request": request, 
-            "due_today_tasks": due_today_tasks,
-            "overdue_tasks": overdue_tasks,
-            "recent_overdue_tasks": recent_overdue_tasks,
+            "due_today_tasks": buckets["due_today"],
+            "overdue_tasks": buckets["long_overdue"],
+            "recent_overdue_tasks": buckets["recent_overdue"],
+            "upcoming_tasks": buckets.get("upcoming", []),
+            "long_overdue_days": LONG_OVERDUE_DAYS,
+            "upcoming_days": UPCOMING_DAYS,
             "user": current_user,
             "today": today,
             "now": now
@@ -68,49 +50,24 @@ async def notifications_page(
     )
 
 @router.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(
+def dashboard(
     request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Hiển thị trang dashboard chính
     """
-    current_user = await get_current_active_user(request, db)
-    today = date.today()
-    now = datetime.now()
-    
-    # Thống kê tổng quan
-    total_tasks = db.query(Task).filter(Task.user_id == current_user.id).count()
-    todo_tasks = db.query(Task).filter(
-        Task.user_id == current_user.id,
-        Task.status == "todo"
-    ).count()
-    done_tasks = db.query(Task).filter(
-        Task.user_id == current_user.id,
-        Task.status == "done"
-    ).count()
+    current_user = get_current_active_user(request, db)
+    # Client đã có bản mới nhất: trả 304, không query cũng không render
+    not_modified = check_not_modified(request, current_user.id)
+    if not_modified:
+        return not_modified
     
-    # Task đến hạn hôm nay
-    due_today_count = db.query(Task).filter(
-        and_(
-            Task.user_id == current_user.id,
-            Task.status == "todo",
-            Task.due_date >= today,
-            Task.due_date < today + timedelta(days=1)
-        )
-    ).count()
-    
-    # Task quá hạn
-    overdue_count = db.query(Task).filter(
-        and_(
-            Task.user_id == current_user.id,
-            Task.status == "todo",
-            Task.due_date < now
-        )
-    ).count()
+    # Thống kê tổng quan (một câu query tổng hợp, có cache ngắn hạn)
+    stats = get_task_stats(db, current_user.id)
     
     # Task gần đây (5 task mới nhất)
-    recent_tasks = db.query(Task).filter(
+    recent_tasks = db.query(Task).options(*TASK_LIST_OPTIONS).filter(
         Task.user_id == current_user.id
     ).order_by(Task.created_at.desc()).limit(5).all()
     
@@ -119,13 +76,36 @@ async def dashboard(
         {
             "request": request, 
             "user": current_user,
-            "stats": {
-                "total_tasks": total_tasks,
-                "todo_tasks": todo_tasks,
-                "done_tasks": done_tasks,
-                "due_today_count": due_today_count,
-                "overdue_count": overdue_count
-            },
+            "stats": stats,
             "recent_tasks": recent_tasks
-        }
-    )
\ No newline at end of file
+        },
+        headers=etag_headers(request, current_user.id)
+    )
+
+@router.get("/notifications/stream")
+async def notifications_stream(request: Request):
+    """
+    Luồng Server-Sent Events đẩy bộ đếm dashboard (đến hạn hôm nay, quá hạn, ...)
+    mỗi khi thay đổi, thay cho việc tải lại trang
+    """
+    # Middleware đã xác thực và gắn user vào request state
+    user_id = request.state.user.id
+    
+    async def event_stream():
+        queue = reminder_broker.subscribe(user_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    message = ": keepalive\n\n"
+                yield message
+        finally:
+            reminder_broker.unsubscribe(user_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,48 +1,54 @@
 # Controller xử lý Subject (chủ đề công việc)
 from fastapi import APIRouter, Depends, HTTPException, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
-from app.models import Subject, User
-from app.schemas import SubjectCreate, Subject as SubjectSchema
+from app.models import Subject, Task, User
+from app.schemas import SubjectCreate, Subject as SubjectSchema, SubjectWithCounts
 from app.utils.auth import get_current_active_user
+from app.utils.refdata import invalidate_user_refdata
+from app.utils.events import reminder_broker
+from app.utils.etag import bump_data_version, check_not_modified, etag_headers
+from app.utils.stats import invalidate_task_stats, count_tasks_by, empty_task_counts
+from app.templating import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/subjects", response_class=HTMLResponse)
-async def list_subjects(
+def list_subjects(
     request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Hiển thị danh sách tất cả subject của user
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     subjects = db.query(Subject).filter(Subject.user_id == current_user.id).all()
+    # Đếm task theo subject bằng một câu GROUP BY thay vì nạp subject.tasks
+    counts = count_tasks_by(db, current_user.id, Task.subject_id)
+    task_counts = {subject.id: counts.get(subject.id, empty_task_counts()) for subject in subjects}
     return templates.TemplateResponse(
         "subjects/list.html", 
-        {"request": request, "subjects": subjects, "user": current_user}
+        {"request": request, "subjects": subjects, "task_counts": task_counts, "user": current_user}
     )
 
 @router.get("/subjects/create", response_class=HTMLResponse)
-async def create_subject_page(
+def create_subject_page(
     request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Hiển thị trang tạo subject mới
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     return templates.TemplateResponse(
         "subjects/create.html", 
         {"request": request, "user": current_user}
     )
 
 @router.post("/subjects/create")
-async def create_subject(
+def create_subject(
     request: Request,
     name: str = Form(...),
     description: str = Form(None),
@@ -51,7 +57,7 @@ async def create_subject(
     """
     Tạo subject mới
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     try:
         # Kiểm tra tên subject đã tồn tại cho user này
         existing_subject = db.query(Subject).filter(
@@ -73,6 +79,8 @@ async def create_subject(
         )
         db.add(db_subject)
         db.commit()
+        invalidate_user_refdata(current_user.id)
+        bump_data_version(current_user.id)
         db.refresh(db_subject)
         
         return RedirectResponse(url="/subjects?message=Tạo chủ đề thành công", status_code=303)
@@ -84,7 +92,7 @@ async def create_subject(
         )
 
 @router.get("/subjects/{subject_id}/edit", response_class=HTMLResponse)
-async def edit_subject_page(
+def edit_subject_page(
     subject_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -92,7 +100,7 @@ async def edit_subject_page(
     """
     Hiển thị trang chỉnh sửa subject
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     subject = db.query(Subject).filter(
         Subject.id == subject_id,
         Subject.user_id == current_user.id
@@ -107,7 +115,7 @@ async def edit_subject_page(
     )
 
 @router.post("/subjects/{subject_id}/edit")
-async def update_subject(
+def update_subject(
     subject_id: int,
     request: Request,
     name: str = Form(...),
@@ -117,7 +125,7 @@ async def update_subject(
     """
     Cập nhật thông tin subject
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     try:
         subject = db.query(Subject).filter(
             Subject.id == subject_id,
@@ -149,6 +157,8 @@ async def update_subject(
         subject.name = name
         subject.description = description
         db.commit()
+        invalidate_user_refdata(current_user.id)
+        bump_data_version(current_user.id)
         
         return RedirectResponse(url="/subjects?message=Cập nhật chủ đề thành công", status_code=303)
         
@@ -164,7 +174,7 @@ async def update_subject(
         )
 
 @router.post("/subjects/{subject_id}/delete")
-async def delete_subject(
+def delete_subject(
     subject_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -172,7 +182,7 @@ async def delete_subject(
     """
     Xóa subject
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     subject = db.query(Subject).filter(
         Subject.id == subject_id,
         Subject.user_id == current_user.id
@@ -184,18 +194,34 @@ async def delete_subject(
     # Xóa subject (các task liên quan sẽ bị xóa theo cascade)
     db.delete(subject)
     db.commit()
+    invalidate_user_refdata(current_user.id)
+    bump_data_version(current_user.id)
+    invalidate_task_stats(current_user.id)
+    reminder_broker.notify_changed(current_user.id)
     
     return RedirectResponse(url="/subjects?message=Xóa chủ đề thành công", status_code=303)
 
 # API endpoints
-@router.get("/api/subjects", response_model=List[SubjectSchema])
-async def get_subjects_api(
+@router.get("/api/subjects", response_model=List[SubjectWithCounts])
+def get_subjects_api(
     request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     API lấy danh sách subject của user
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
+    not_modified = check_not_modified(request, current_user.id)
+    if not_modified:
+        return not_modified
+    response.headers.update(etag_headers(request, current_user.id))
     subjects = db.query(Subject).filter(Subject.user_id == current_user.id).all()
-    return subjects
\ No newline at end of file
+    counts = count_tasks_by(db, current_user.id, Task.subject_id)
+    return [
+        SubjectWithCounts(
+            **SubjectSchema.model_validate(subject).model_dump(),
+            task_counts=counts.get(subject.id, empty_task_counts())
+        )
+        for subject in subjects
+    ]
\ No newline at end of file
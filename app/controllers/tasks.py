@@ -1,38 +1,51 @@
 # Controller xử lý Task (công việc)
-from fastapi import APIRouter, Depends, HTTPException, Request, Form, Query
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from datetime import datetime, date
+import base64
+import csv
+import io
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, Form, Query, UploadFile, File
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, Response
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, func, literal, type_coerce, String
+from datetime import datetime, date, timedelta
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.models import Task, Subject, Label, User
-from app.schemas import TaskCreate, Task as TaskSchema
+from app.schemas import (
+    TaskCreate, Task as TaskSchema, TaskPage, TaskSearchResult, TaskBulkAction, TaskBulkResult,
+    TaskImportResult, TaskActionResult
+)
 from app.utils.auth import get_current_active_user
+from app.utils.stats import invalidate_task_stats, get_task_stats
+from app.utils.events import reminder_broker
+from app.utils.scheduler import due_scheduler
+from app.utils.etag import bump_data_version, check_not_modified, etag_headers
+from app.utils.refdata import get_user_subjects, get_user_labels, user_owns_subject, user_owns_label
+from app.importer import import_tasks, IMPORT_FORMATS
+from app.utils.search import build_match_query, match_task_ids, search_tasks_ranked, task_snippets
+from app.templating import templates
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
-@router.get("/tasks", response_class=HTMLResponse)
-async def list_tasks(
-    request: Request,
-    subject_id: Optional[int] = Query(None),
-    status: Optional[str] = Query(None),
-    label_id: Optional[int] = Query(None),
-    due_today: Optional[bool] = Query(None),
-    overdue: Optional[bool] = Query(None),
-    search: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+# Số task mặc định / tối đa trên một trang
+TASK_PAGE_SIZE = 20
+MAX_TASK_PAGE_SIZE = 100
+
+def _apply_task_filters(
+    query,
+    user_id: int,
+    subject_id: Optional[int] = None,
+    status: Optional[str] = None,
+    label_id: Optional[int] = None,
+    due_today: Optional[bool] = None,
+    overdue: Optional[bool] = None,
+    search: Optional[str] = None
 ):
     """
-    Hiển thị danh sách task với các bộ lọc
+    Áp dụng các bộ lọc task của user lên một query (dùng chung cho danh sách, API và export)
     """
-    current_user = await get_current_active_user(request, db)
-    # Query cơ bản
-    query = db.query(Task).filter(Task.user_id == current_user.id)
+    query = query.filter(Task.user_id == user_id)
     
-    # Áp dụng các bộ lọc
     if subject_id:
         query = query.filter(Task.subject_id == subject_id)
     
@@ -44,26 +57,120 @@ async def list_tasks(
     
     if due_today:
         today = date.today()
-        query = query.filter(Task.due_date >= today).filter(Task.due_date < today.replace(day=today.day + 1))
+        query = query.filter(Task.due_date >= today).filter(Task.due_date < today + timedelta(days=1))
     
     if overdue:
-        today = datetime.now()
-        query = query.filter(Task.due_date < today).filter(Task.status == "todo")
+        now = datetime.now()
+        query = query.filter(Task.due_date < now).filter(Task.status == "todo")
     
     if search:
+        # Tìm kiếm qua index FTS5 thay vì LIKE '%...%'
+        match_query = build_match_query(search)
+        if match_query:
+            query = query.filter(Task.id.in_(match_task_ids(match_query)))
+    
+    return query
+
+def _build_task_query(db: Session, user_id: int, *filters):
+    """
+    Tạo query task của user với các bộ lọc (dùng chung cho trang HTML và API)
+    """
+    # Nạp sẵn subject và label trong cùng câu query để tránh N+1 khi render
+    query = db.query(Task).options(
+        joinedload(Task.subject),
+        joinedload(Task.label)
+    )
+    return _apply_task_filters(query, user_id, *filters)
+
+def _encode_cursor(created_at: str, task_id: int) -> str:
+    """
+    Mã hóa vị trí (created_at, id) của task thành cursor
+    created_at là chuỗi đúng như SQLite đang lưu: CURRENT_TIMESTAMP không có phần
+    micro giây, còn giá trị ghi qua SQLAlchemy luôn có ".ffffff", nên không tự định dạng lại
+    """
+    raw = f"{created_at}|{task_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    """
+    Giải mã cursor thành (created_at, id)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, task_id = raw.rsplit("|", 1)
+        datetime.fromisoformat(created_at)
+        return created_at, int(task_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor không hợp lệ")
+
+def _paginate_tasks(query, cursor: Optional[str], limit: int):
+    """
+    Phân trang keyset theo (created_at, id) giảm dần
+    Trả về (danh sách task, cursor trang sau hoặc None)
+    """
+    if cursor:
+        created_at, task_id = _decode_cursor(cursor)
+        # So sánh dạng chuỗi với giá trị đã lưu trong SQLite
+        created_at = literal(created_at, String)
         query = query.filter(
             or_(
-                Task.title.contains(search),
-                Task.note.contains(search)
+                Task.created_at < created_at,
+                and_(Task.created_at == created_at, Task.id < task_id)
             )
         )
     
-    # Lấy kết quả và sắp xếp
-    tasks = query.order_by(Task.created_at.desc()).all()
+    # Lấy thêm 1 dòng để biết còn trang sau hay không; kèm created_at dạng
+    # chuỗi thô (không chuyển sang datetime) để cursor khớp chính xác giá trị đã lưu
+    rows = query.add_columns(type_coerce(Task.created_at, String)).order_by(
+        Task.created_at.desc(), Task.id.desc()
+    ).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_task, last_created_at = rows[-1]
+        next_cursor = _encode_cursor(last_created_at, last_task.id)
+    return [task for task, _ in rows], next_cursor
+
+@router.get("/tasks", response_class=HTMLResponse)
+def list_tasks(
+    request: Request,
+    subject_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None),
+    label_id: Optional[int] = Query(None),
+    due_today: Optional[bool] = Query(None),
+    overdue: Optional[bool] = Query(None),
+    search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(TASK_PAGE_SIZE, ge=1, le=MAX_TASK_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """
+    Hiển thị danh sách task với các bộ lọc (phân trang theo cursor)
+    """
+    current_user = get_current_active_user(request, db)
+    # Client đã có bản mới nhất: trả 304, không query cũng không render
+    not_modified = check_not_modified(request, current_user.id)
+    if not_modified:
+        return not_modified
+    
+    query = _build_task_query(
+        db, current_user.id, subject_id, status, label_id, due_today, overdue, search
+    )
+    tasks, next_cursor = _paginate_tasks(query, cursor, limit)
     
     # Lấy danh sách subject và label để hiển thị trong filter
-    subjects = db.query(Subject).filter(Subject.user_id == current_user.id).all()
-    labels = db.query(Label).filter(Label.user_id == current_user.id).all()
+    subjects = get_user_subjects(db, current_user.id)
+    labels = get_user_labels(db, current_user.id)
+    
+    # Đoạn trích có đánh dấu từ khóa cho kết quả tìm kiếm
+    snippets = {}
+    match_query = build_match_query(search) if search else None
+    if match_query:
+        snippets = task_snippets(db, [task.id for task in tasks], match_query)
+    
+    # Link sang trang sau / quay về trang đầu, giữ nguyên bộ lọc
+    next_url = str(request.url.include_query_params(cursor=next_cursor)) if next_cursor else None
+    first_url = str(request.url.remove_query_params("cursor")) if cursor else None
     
     return templates.TemplateResponse(
         "tasks/list.html", 
@@ -73,6 +180,9 @@ async def list_tasks(
             "subjects": subjects,
             "labels": labels,
             "user": current_user,
+            "next_url": next_url,
+            "first_url": first_url,
+            "snippets": snippets,
             "filters": {
                 "subject_id": subject_id,
                 "status": status,
@@ -81,20 +191,178 @@ async def list_tasks(
                 "overdue": overdue,
                 "search": search
             }
-        }
+        },
+        headers=etag_headers(request, current_user.id)
+    )
+
+@router.get("/api/tasks", response_model=TaskPage)
+def get_tasks_api(
+    request: Request,
+    response: Response,
+    subject_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None),
+    label_id: Optional[int] = Query(None),
+    due_today: Optional[bool] = Query(None),
+    overdue: Optional[bool] = Query(None),
+    search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(TASK_PAGE_SIZE, ge=1, le=MAX_TASK_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """
+    API lấy danh sách task của user (phân trang theo cursor)
+    """
+    current_user = get_current_active_user(request, db)
+    not_modified = check_not_modified(request, current_user.id)
+    if not_modified:
+        return not_modified
+    response.headers.update(etag_headers(request, current_user.id))
+    query = _build_task_query(
+        db, current_user.id, subject_id, status, label_id, due_today, overdue, search
     )
+    tasks, next_cursor = _paginate_tasks(query, cursor, limit)
+    return {"items": tasks, "next_cursor": next_cursor}
+
+# Các cột trong file export và số dòng đọc từ database mỗi lần
+EXPORT_COLUMNS = [
+    "id", "title", "note", "status", "due_date", "created_at", "updated_at", "subject", "label"
+]
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "jsonl": "application/x-ndjson"}
+
+def _export_value(value):
+    """
+    Chuyển giá trị datetime sang ISO 8601 khi export
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _iter_export_rows(user_id: int, filters: tuple, export_format: str):
+    """
+    Đọc task theo từng lô (yield_per) và sinh dữ liệu export theo từng đoạn
+    Dùng session riêng vì generator chạy sau khi handler đã trả về
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(
+            Task.id, Task.title, Task.note, Task.status, Task.due_date,
+            Task.created_at, Task.updated_at, Subject.name, Label.name
+        ).outerjoin(Subject, Task.subject_id == Subject.id).outerjoin(Label, Task.label_id == Label.id)
+        query = _apply_task_filters(query, user_id, *filters)
+        rows = query.order_by(Task.created_at.desc(), Task.id.desc()).yield_per(EXPORT_BATCH_SIZE)
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(EXPORT_COLUMNS)
+        
+        count = 0
+        for row in rows:
+            values = [_export_value(value) for value in row]
+            if export_format == "csv":
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values)), ensure_ascii=False))
+                buffer.write("\n")
+            count += 1
+            if count % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+@router.get("/api/tasks/export")
+def export_tasks(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|jsonl)$"),
+    subject_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None),
+    label_id: Optional[int] = Query(None),
+    due_today: Optional[bool] = Query(None),
+    overdue: Optional[bool] = Query(None),
+    search: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Export task của user (CSV hoặc JSON lines) dạng stream, dùng chung bộ lọc với /tasks
+    """
+    current_user = get_current_active_user(request, db)
+    filters = (subject_id, status, label_id, due_today, overdue, search)
+    return StreamingResponse(
+        _iter_export_rows(current_user.id, filters, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'}
+    )
+
+@router.post("/api/tasks/import", response_model=TaskImportResult)
+def import_tasks_api(
+    request: Request,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Nhập task từ file CSV / JSON lines (đọc dạng stream, lỗi được báo theo từng dòng)
+    Định dạng lấy từ tham số format hoặc phần mở rộng của file
+    """
+    current_user = get_current_active_user(request, db)
+    import_format = format or (file.filename or "").rsplit(".", 1)[-1].lower()
+    if import_format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Chỉ hỗ trợ file CSV hoặc JSON lines")
+    
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        # File không phải UTF-8 được báo như một dòng lỗi, giữ các lô đã nhập
+        return import_tasks(db, current_user.id, stream, import_format)
+    finally:
+        stream.detach()
+
+@router.get("/api/tasks/search", response_model=List[TaskSearchResult])
+def search_tasks_api(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(TASK_PAGE_SIZE, ge=1, le=MAX_TASK_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    """
+    API tìm kiếm task theo độ liên quan, kèm đoạn trích có đánh dấu từ khóa
+    """
+    current_user = get_current_active_user(request, db)
+    match_query = build_match_query(q)
+    if not match_query:
+        return []
+    
+    ranked = search_tasks_ranked(db, current_user.id, match_query, limit)
+    tasks = db.query(Task).options(
+        joinedload(Task.subject),
+        joinedload(Task.label)
+    ).filter(Task.id.in_([task_id for task_id, _, _ in ranked])).all()
+    tasks_by_id = {task.id: task for task in tasks}
+    
+    results = []
+    for task_id, score, snippet in ranked:
+        result = TaskSearchResult.model_validate(tasks_by_id[task_id])
+        result.score = score
+        result.snippet = snippet
+        results.append(result)
+    return results
 
 @router.get("/tasks/create", response_class=HTMLResponse)
-async def create_task_page(
+def create_task_page(
     request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Hiển thị trang tạo task mới
     """
-    current_user = await get_current_active_user(request, db)
-    subjects = db.query(Subject).filter(Subject.user_id == current_user.id).all()
-    labels = db.query(Label).filter(Label.user_id == current_user.id).all()
+    current_user = get_current_active_user(request, db)
+    subjects = get_user_subjects(db, current_user.id)
+    labels = get_user_labels(db, current_user.id)
     
     return templates.TemplateResponse(
         "tasks/create.html", 
@@ -107,7 +375,7 @@ async def create_task_page(
     )
 
 @router.post("/tasks/create")
-async def create_task(
+def create_task(
     request: Request,
     title: str = Form(...),
     note: str = Form(None),
@@ -119,17 +387,12 @@ async def create_task(
     """
     Tạo task mới
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     try:
         # Kiểm tra subject có thuộc về user không
-        subject = db.query(Subject).filter(
-            Subject.id == subject_id,
-            Subject.user_id == current_user.id
-        ).first()
-        
-        if not subject:
-            subjects = db.query(Subject).filter(Subject.user_id == current_user.id).all()
-            labels = db.query(Label).filter(Label.user_id == current_user.id).all()
+        if not user_owns_subject(db, current_user.id, subject_id):
+            subjects = get_user_subjects(db, current_user.id)
+            labels = get_user_labels(db, current_user.id)
             return templates.TemplateResponse(
                 "tasks/create.html",
                 {
@@ -147,11 +410,7 @@ async def create_task(
             try:
                 parsed_label_id = int(label_id)
                 # Kiểm tra label có thuộc về user không
-                label = db.query(Label).filter(
-                    Label.id == parsed_label_id,
-                    Label.user_id == current_user.id
-                ).first()
-                if not label:
+                if not user_owns_label(db, current_user.id, parsed_label_id):
                     parsed_label_id = None
             except ValueError:
                 parsed_label_id = None
@@ -179,13 +438,17 @@ async def create_task(
         )
         db.add(db_task)
         db.commit()
+        invalidate_task_stats(current_user.id)
+        reminder_broker.notify_changed(current_user.id)
+        bump_data_version(current_user.id)
         db.refresh(db_task)
+        due_scheduler.schedule_task(db_task)
         
         return RedirectResponse(url="/tasks?message=Tạo công việc thành công", status_code=303)
         
     except Exception as e:
-        subjects = db.query(Subject).filter(Subject.user_id == current_user.id).all()
-        labels = db.query(Label).filter(Label.user_id == current_user.id).all()
+        subjects = get_user_subjects(db, current_user.id)
+        labels = get_user_labels(db, current_user.id)
         return templates.TemplateResponse(
             "tasks/create.html",
             {
@@ -198,7 +461,7 @@ async def create_task(
         )
 
 @router.get("/tasks/{task_id}/edit", response_class=HTMLResponse)
-async def edit_task_page(
+def edit_task_page(
     task_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -206,7 +469,7 @@ async def edit_task_page(
     """
     Hiển thị trang chỉnh sửa task
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     task = db.query(Task).filter(
         Task.id == task_id,
         Task.user_id == current_user.id
@@ -215,8 +478,8 @@ async def edit_task_page(
     if not task:
         raise HTTPException(status_code=404, detail="Không tìm thấy công việc")
     
-    subjects = db.query(Subject).filter(Subject.user_id == current_user.id).all()
-    labels = db.query(Label).filter(Label.user_id == current_user.id).all()
+    subjects = get_user_subjects(db, current_user.id)
+    labels = get_user_labels(db, current_user.id)
     
     return templates.TemplateResponse(
         "tasks/edit.html", 
@@ -229,8 +492,52 @@ async def edit_task_page(
         }
     )
 
+# ===== Phản hồi tại chỗ cho toggle / sửa / xóa =====
+
+# Media type client gửi trong Accept để nhận lại một dòng task dạng HTML
+TASK_FRAGMENT_MEDIA_TYPE = "text/vnd.todo.task-fragment+html"
+
+def _negotiate_task_response(request: Request) -> Optional[str]:
+    """
+    Chọn kiểu phản hồi theo header Accept: "fragment", "json",
+    hoặc None (form thường: redirect về trang danh sách)
+    """
+    accept = request.headers.get("accept", "")
+    if TASK_FRAGMENT_MEDIA_TYPE in accept:
+        return "fragment"
+    if "application/json" in accept:
+        return "json"
+    return None
+
+def _task_action_response(
+    request: Request,
+    db: Session,
+    user_id: int,
+    mode: str,
+    task_id: int,
+    task: Optional[Task] = None
+):
+    """
+    Phản hồi sau khi thay đổi một task: chỉ render dòng task đó (fragment)
+    hoặc trả JSON gồm trạng thái mới và bộ đếm dashboard (task=None: đã xóa)
+    """
+    deleted = task is None
+    if mode == "fragment":
+        if deleted:
+            return HTMLResponse("")
+        return templates.TemplateResponse(
+            "tasks/_task_item.html", {"request": request, "task": task}
+        )
+    return TaskActionResult(
+        id=task_id,
+        status=None if deleted else task.status,
+        deleted=deleted,
+        task=None if deleted else TaskSchema.model_validate(task),
+        stats=get_task_stats(db, user_id)
+    )
+
 @router.post("/tasks/{task_id}/edit")
-async def update_task(
+def update_task(
     task_id: int,
     request: Request,
     title: str = Form(...),
@@ -244,7 +551,9 @@ async def update_task(
     """
     Cập nhật thông tin task
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
+    mode = _negotiate_task_response(request)
+    task = None
     try:
         task = db.query(Task).filter(
             Task.id == task_id,
@@ -255,14 +564,11 @@ async def update_task(
             raise HTTPException(status_code=404, detail="Không tìm thấy công việc")
         
         # Kiểm tra subject có thuộc về user không
-        subject = db.query(Subject).filter(
-            Subject.id == subject_id,
-            Subject.user_id == current_user.id
-        ).first()
-        
-        if not subject:
-            subjects = db.query(Subject).filter(Subject.user_id == current_user.id).all()
-            labels = db.query(Label).filter(Label.user_id == current_user.id).all()
+        if not user_owns_subject(db, current_user.id, subject_id):
+            if mode:
+                raise HTTPException(status_code=400, detail="Chủ đề không hợp lệ")
+            subjects = get_user_subjects(db, current_user.id)
+            labels = get_user_labels(db, current_user.id)
             return templates.TemplateResponse(
                 "tasks/edit.html",
                 {
@@ -281,11 +587,7 @@ async def update_task(
             try:
                 parsed_label_id = int(label_id)
                 # Kiểm tra label có thuộc về user không
-                label = db.query(Label).filter(
-                    Label.id == parsed_label_id,
-                    Label.user_id == current_user.id
-                ).first()
-                if not label:
+                if not user_owns_label(db, current_user.id, parsed_label_id):
                     parsed_label_id = None
             except ValueError:
                 parsed_label_id = None
@@ -309,12 +611,26 @@ async def update_task(
         task.due_date = parsed_due_date
         task.status = status
         db.commit()
+        invalidate_task_stats(current_user.id)
+        reminder_broker.notify_changed(current_user.id)
+        bump_data_version(current_user.id)
+        due_scheduler.schedule_task(task)
         
+        if mode:
+            return _task_action_response(request, db, current_user.id, mode, task_id, task)
         return RedirectResponse(url="/tasks?message=Cập nhật công việc thành công", status_code=303)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        subjects = db.query(Subject).filter(Subject.user_id == current_user.id).all()
-        labels = db.query(Label).filter(Label.user_id == current_user.id).all()
+        db.rollback()
+        # Client JSON / fragment nhận lỗi 500, chỉ form HTML mới được render lại trang sửa
+        if mode:
+            raise HTTPException(status_code=500, detail="Có lỗi xảy ra khi cập nhật công việc")
+        if task is None:
+            return RedirectResponse(url="/tasks?message=Có lỗi xảy ra khi cập nhật công việc", status_code=303)
+        subjects = get_user_subjects(db, current_user.id)
+        labels = get_user_labels(db, current_user.id)
         return templates.TemplateResponse(
             "tasks/edit.html",
             {
@@ -328,7 +644,7 @@ async def update_task(
         )
 
 @router.post("/tasks/{task_id}/toggle")
-async def toggle_task_status(
+def toggle_task_status(
     task_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -336,7 +652,7 @@ async def toggle_task_status(
     """
     Toggle trạng thái task (todo <-> done)
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     task = db.query(Task).filter(
         Task.id == task_id,
         Task.user_id == current_user.id
@@ -348,11 +664,18 @@ async def toggle_task_status(
     # Toggle status
     task.status = "done" if task.status == "todo" else "todo"
     db.commit()
+    invalidate_task_stats(current_user.id)
+    reminder_broker.notify_changed(current_user.id)
+    bump_data_version(current_user.id)
+    due_scheduler.schedule_task(task)
     
+    mode = _negotiate_task_response(request)
+    if mode:
+        return _task_action_response(request, db, current_user.id, mode, task_id, task)
     return RedirectResponse(url="/tasks", status_code=303)
 
 @router.post("/tasks/{task_id}/delete")
-async def delete_task(
+def delete_task(
     task_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -360,7 +683,7 @@ async def delete_task(
     """
     Xóa task
     """
-    current_user = await get_current_active_user(request, db)
+    current_user = get_current_active_user(request, db)
     task = db.query(Task).filter(
         Task.id == task_id,
         Task.user_id == current_user.id
@@ -371,5 +694,127 @@ async def delete_task(
     
     db.delete(task)
     db.commit()
+    invalidate_task_stats(current_user.id)
+    reminder_broker.notify_changed(current_user.id)
+    bump_data_version(current_user.id)
+    due_scheduler.unschedule_tasks([task_id])
+    
+    mode = _negotiate_task_response(request)
+    if mode:
+        return _task_action_response(request, db, current_user.id, mode, task_id)
+    return RedirectResponse(url="/tasks?message=Xóa công việc thành công", status_code=303)
+
+# ===== Thao tác hàng loạt =====
+
+# Số task tối đa trong một yêu cầu thao tác hàng loạt
+MAX_BULK_TASKS = 1000
+BULK_ACTIONS = ("done", "todo", "move", "label", "delete")
+BULK_MESSAGES = {
+    "done": "Đã đánh dấu hoàn thành {count} công việc",
+    "todo": "Đã đánh dấu chưa xong {count} công việc",
+    "move": "Đã chuyển {count} công việc sang chủ đề mới",
+    "label": "Đã đổi nhãn {count} công việc",
+    "delete": "Đã xóa {count} công việc",
+}
+
+def _apply_bulk_action(
+    db: Session,
+    user_id: int,
+    action: str,
+    task_ids: List[int],
+    subject_id: Optional[int] = None,
+    label_id: Optional[int] = None
+) -> int:
+    """
+    Áp dụng thao tác cho nhiều task bằng một câu UPDATE / DELETE
+    (giới hạn theo user_id) trong một transaction
+    Trả về số task bị ảnh hưởng
+    """
+    if action not in BULK_ACTIONS:
+        raise HTTPException(status_code=400, detail="Thao tác không hợp lệ")
+    if len(task_ids) > MAX_BULK_TASKS:
+        raise HTTPException(status_code=400, detail=f"Tối đa {MAX_BULK_TASKS} công việc mỗi lần")
+    if not task_ids:
+        return 0
+    
+    query = db.query(Task).filter(
+        Task.user_id == user_id,
+        Task.id.in_(set(task_ids))
+    )
+    
+    if action == "delete":
+        count = query.delete(synchronize_session=False)
+    else:
+        if action in ("done", "todo"):
+            values = {Task.status: action}
+        elif action == "move":
+            if subject_id is None or not user_owns_subject(db, user_id, subject_id):
+                raise HTTPException(status_code=400, detail="Chủ đề không hợp lệ")
+            values = {Task.subject_id: subject_id}
+        else:
+            # label_id = None nghĩa là bỏ nhãn
+            if label_id is not None and not user_owns_label(db, user_id, label_id):
+                raise HTTPException(status_code=400, detail="Nhãn không hợp lệ")
+            values = {Task.label_id: label_id}
+        values[Task.updated_at] = func.now()
+        count = query.update(values, synchronize_session=False)
+    
+    db.commit()
+    invalidate_task_stats(user_id)
+    reminder_broker.notify_changed(user_id)
+    bump_data_version(user_id)
     
-    return RedirectResponse(url="/tasks?message=Xóa công việc thành công", status_code=303)
\ No newline at end of file
+    # Cập nhật lịch nhắc việc: task xong / bị xóa thì bỏ, task mở lại thì nạp lại
+    if action in ("done", "delete"):
+        due_scheduler.unschedule_tasks(task_ids, user_id=user_id)
+    elif action == "todo":
+        due_scheduler.reload_user(db, user_id)
+    return count
+
+@router.post("/tasks/bulk")
+def bulk_update_tasks(
+    request: Request,
+    action: str = Form(...),
+    task_ids: List[int] = Form([]),
+    subject_id: Optional[str] = Form(None),
+    label_id: Optional[str] = Form(None),  # Chuỗi rỗng = bỏ nhãn
+    db: Session = Depends(get_db)
+):
+    """
+    Thao tác hàng loạt trên các task được chọn (form HTML)
+    """
+    current_user = get_current_active_user(request, db)
+    if not task_ids:
+        return RedirectResponse(url="/tasks?message=Chưa chọn công việc nào", status_code=303)
+    
+    try:
+        parsed_subject_id = int(subject_id) if subject_id and subject_id.strip() else None
+        parsed_label_id = int(label_id) if label_id and label_id.strip() else None
+    except ValueError:
+        return RedirectResponse(url="/tasks?message=Dữ liệu không hợp lệ", status_code=303)
+    
+    # Lỗi dữ liệu (chủ đề / nhãn không hợp lệ, quá số task tối đa) được báo qua
+    # thông báo trên trang danh sách thay vì trang JSON
+    try:
+        count = _apply_bulk_action(
+            db, current_user.id, action, task_ids, parsed_subject_id, parsed_label_id
+        )
+    except HTTPException as e:
+        return RedirectResponse(url=f"/tasks?message={e.detail}", status_code=303)
+    message = BULK_MESSAGES[action].format(count=count)
+    return RedirectResponse(url=f"/tasks?message={message}", status_code=303)
+
+@router.post("/api/tasks/bulk", response_model=TaskBulkResult)
+def bulk_update_tasks_api(
+    request: Request,
+    payload: TaskBulkAction,
+    db: Session = Depends(get_db)
+):
+    """
+    API thao tác hàng loạt trên danh sách task
+    """
+    current_user = get_current_active_user(request, db)
+    count = _apply_bulk_action(
+        db, current_user.id, payload.action, payload.task_ids, payload.subject_id, payload.label_id
+    )
+    return {"action": payload.action, "affected": count}
@@ -1,18 +1,90 @@
 # Cấu hình cơ sở dữ liệu SQLite
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from typing import Optional
 import os
 
-# Đường dẫn tới file database SQLite
-SQLALCHEMY_DATABASE_URL = "sqlite:///./todo_app.db"
+# Đường dẫn tới file database SQLite (có thể đổi qua biến môi trường DATABASE_URL)
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./todo_app.db")
+
+# Profile cấu hình SQLite, chọn qua biến môi trường DATABASE_PROFILE
+# - default: giữ cấu hình mặc định của SQLite (rollback journal)
+# - production: WAL cho phép đọc song song với ghi, giảm fsync, tăng cache
+DATABASE_PROFILES = {
+    "default": {
+        "pragmas": {},
+        "pool": {},
+        # Pool mặc định của SQLAlchemy (5 + 10 overflow) nhỏ hơn threadpool: không giới
+        # hạn threadpool theo nó, handler sync chờ kết nối (pool_timeout) khi pool hết
+        "limit_threadpool": False,
+    },
+    "production": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+            "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+            "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")),
+            "temp_store": "MEMORY",
+        },
+        # Số kết nối cố định, bằng số thread mặc định của threadpool anyio (40)
+        "pool": {
+            "pool_size": int(os.getenv("DB_POOL_SIZE", "40")),
+            "max_overflow": 0,
+            "pool_timeout": 30,
+            "pool_pre_ping": False,
+        },
+        # Giới hạn threadpool theo dung lượng pool khi DB_POOL_SIZE < 40 (xem lifespan trong main.py)
+        "limit_threadpool": True,
+    },
+}
+DATABASE_PROFILE = os.getenv("DATABASE_PROFILE", "default")
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, profile: str = DATABASE_PROFILE):
+    """
+    Tạo engine kết nối database theo profile cấu hình
+    """
+    if profile not in DATABASE_PROFILES:
+        raise ValueError(f"DATABASE_PROFILE không hợp lệ: {profile}")
+    settings = DATABASE_PROFILES[profile]
+
+    # Database trong bộ nhớ không dùng được pool nhiều kết nối
+    pool_settings = settings["pool"] if ":memory:" not in url else {}
+
+    # check_same_thread=False cho phép sử dụng database từ nhiều thread
+    db_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        **pool_settings
+    )
+
+    pragmas = settings["pragmas"]
+    if pragmas:
+        @event.listens_for(db_engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            """
+            Áp dụng PRAGMA cho mỗi kết nối mới
+            """
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    return db_engine
+
+def pool_capacity(db_engine) -> Optional[int]:
+    """
+    Số kết nối tối đa pool có thể cấp cùng lúc (None nếu không giới hạn)
+    """
+    pool = db_engine.pool
+    if not isinstance(pool, QueuePool) or pool._max_overflow < 0:
+        return None
+    return pool.size() + pool._max_overflow
 
 # Tạo engine kết nối database
-# check_same_thread=False cho phép sử dụng database từ nhiều thread
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+engine = create_db_engine()
 
 # Tạo SessionLocal để quản lý session database
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -25,9 +97,11 @@ def get_db():
     """
     Tạo và quản lý database session
     Đảm bảo session được đóng sau khi sử dụng
+    Session là đồng bộ: các route dùng nó phải khai báo bằng `def` (không phải
+    `async def`) để FastAPI chạy trong threadpool, tránh chặn event loop
     """
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
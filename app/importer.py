@@ -0,0 +1,273 @@
+# Nhập (import) task hàng loạt từ file CSV / JSON lines
+# Định dạng cột giống file export (/api/tasks/export): title, note, status,
+# due_date, subject, label (các cột khác như id, created_at bị bỏ qua)
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.models import Task, Subject, Label
+from app.utils.refdata import invalidate_user_refdata
+from app.utils.stats import invalidate_task_stats
+from app.utils.events import reminder_broker
+from app.utils.scheduler import due_scheduler
+from app.utils.etag import bump_data_version
+
+# Số dòng mỗi transaction
+IMPORT_BATCH_SIZE = 1000
+# Số lỗi tối đa trả về chi tiết trong báo cáo
+MAX_REPORTED_ERRORS = 100
+# Chủ đề dùng khi dòng không có cột subject
+DEFAULT_IMPORT_SUBJECT = "Nhập từ file"
+IMPORT_FORMATS = ("csv", "jsonl")
+
+class RowError(ValueError):
+    """
+    Lỗi dữ liệu của một dòng, dòng đó bị bỏ qua
+    """
+    pass
+
+def parse_due_date(value) -> Optional[datetime]:
+    """
+    Chuyển chuỗi hạn chót (ISO 8601, "%Y-%m-%dT%H:%M" hoặc "%Y-%m-%d") sang datetime
+    """
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        raise RowError(f"Hạn chót phải là chuỗi: {value!r}")
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise RowError(f"Hạn chót không hợp lệ: {value}")
+
+def _clean(value, max_length: int, field: str) -> Optional[str]:
+    """
+    Chuẩn hóa chuỗi và kiểm tra kiểu, độ dài
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise RowError(f"{field} phải là chuỗi")
+    value = value.strip()
+    if not value:
+        return None
+    if len(value) > max_length:
+        raise RowError(f"{field} dài quá {max_length} ký tự")
+    return value
+
+def parse_row(row: dict) -> dict:
+    """
+    Kiểm tra và chuẩn hóa một dòng dữ liệu
+    """
+    if not isinstance(row, dict):
+        raise RowError("Dòng không phải object")
+    
+    title = _clean(row.get("title"), 200, "Tiêu đề")
+    if not title:
+        raise RowError("Thiếu tiêu đề")
+    
+    status = _clean(row.get("status"), 20, "Trạng thái") or "todo"
+    if status not in ("todo", "done"):
+        raise RowError(f"Trạng thái không hợp lệ: {status}")
+    
+    note = row.get("note")
+    if note is not None and not isinstance(note, str):
+        raise RowError("Ghi chú phải là chuỗi")
+    
+    return {
+        "title": title,
+        "note": note or None,
+        "status": status,
+        "due_date": parse_due_date(row.get("due_date")),
+        "subject": _clean(row.get("subject"), 100, "Chủ đề") or DEFAULT_IMPORT_SUBJECT,
+        "label": _clean(row.get("label"), 50, "Nhãn"),
+    }
+
+def iter_records(stream: io.TextIOBase, import_format: str) -> Iterator[Tuple[int, object]]:
+    """
+    Đọc file theo từng dòng, sinh (số dòng, dữ liệu thô)
+    Lỗi cú pháp JSON được trả về dưới dạng RowError để ghi nhận theo dòng
+    """
+    if import_format == "csv":
+        reader = csv.DictReader(stream)
+        while True:
+            line_number = reader.line_num
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                yield reader.line_num, RowError(f"CSV không hợp lệ: {e}")
+                if reader.line_num == line_number:
+                    # Reader không đọc thêm được dòng nào: dừng để tránh lặp vô hạn
+                    break
+                continue
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, RowError(f"JSON không hợp lệ: {e}")
+
+class TaskImporter:
+    """
+    Nhập task cho một user theo lô: mỗi lô tạo các subject / label còn thiếu
+    một lần, chèn task bằng executemany và commit trong một transaction
+    """
+    
+    def __init__(self, db: Session, user_id: int, batch_size: int = IMPORT_BATCH_SIZE):
+        self.db = db
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.subject_ids: Dict[str, int] = {}
+        self.label_ids: Dict[str, int] = {}
+        self._load_names()
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+    
+    def _record_error(self, line_number: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "error": message})
+    
+    def _ensure_names(self, model, names: set, known: Dict[str, int]) -> None:
+        """
+        Tạo các subject / label chưa có và cập nhật bảng tên -> id
+        """
+        missing = names - known.keys()
+        if not missing:
+            return
+        self.db.execute(
+            insert(model),
+            [{"name": name, "user_id": self.user_id} for name in missing]
+        )
+        known.update(
+            self.db.query(model.name, model.id).filter(
+                model.user_id == self.user_id,
+                model.name.in_(missing)
+            ).all()
+        )
+    
+    def _load_names(self) -> None:
+        """
+        Đọc lại bảng tên -> id của subject / label từ database
+        """
+        self.subject_ids = dict(
+            self.db.query(Subject.name, Subject.id).filter(Subject.user_id == self.user_id).all()
+        )
+        self.label_ids = dict(
+            self.db.query(Label.name, Label.id).filter(Label.user_id == self.user_id).all()
+        )
+    
+    def _flush(self, batch: list) -> None:
+        """
+        Ghi một lô (danh sách (số dòng, dữ liệu)); nếu database từ chối lô thì
+        rollback và ghi nhận lỗi cho từng dòng của lô, các lô khác vẫn tiếp tục
+        """
+        if not batch:
+            return
+        rows = [row for _, row in batch]
+        try:
+            self._ensure_names(Subject, {row["subject"] for row in rows}, self.subject_ids)
+            self._ensure_names(Label, {row["label"] for row in rows if row["label"]}, self.label_ids)
+            self.db.execute(
+                insert(Task),
+                [
+                    {
+                        "title": row["title"],
+                        "note": row["note"],
+                        "status": row["status"],
+                        "due_date": row["due_date"],
+                        "user_id": self.user_id,
+                        "subject_id": self.subject_ids[row["subject"]],
+                        "label_id": self.label_ids[row["label"]] if row["label"] else None,
+                    }
+                    for row in rows
+                ]
+            )
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            # Subject / label tạo trong lô cũng bị rollback
+            self._load_names()
+            message = f"Lỗi database khi ghi lô: {e.__class__.__name__}"
+            for line_number, _ in batch:
+                self._record_error(line_number, message)
+            return
+        self.imported += len(batch)
+    
+    def run(self, records: Iterable[Tuple[int, object]]) -> dict:
+        """
+        Nhập các dòng dữ liệu, trả về báo cáo kết quả
+        """
+        batch = []
+        line_number = 0
+        try:
+            try:
+                for line_number, record in records:
+                    try:
+                        if isinstance(record, RowError):
+                            raise record
+                        batch.append((line_number, parse_row(record)))
+                    except RowError as e:
+                        self._record_error(line_number, str(e))
+                        continue
+                    if len(batch) >= self.batch_size:
+                        self._flush(batch)
+                        batch = []
+            except csv.Error as e:
+                # File hỏng không đọc tiếp được: giữ các dòng đã đọc, báo lỗi tại dòng cuối
+                self._record_error(line_number + 1, f"CSV không hợp lệ: {e}")
+            except UnicodeDecodeError:
+                # Các lô trước đã được commit: báo lỗi tại dòng cuối thay vì bỏ cả báo cáo
+                self._record_error(line_number + 1, "File phải được mã hóa UTF-8")
+            self._flush(batch)
+        finally:
+            invalidate_task_stats(self.user_id)
+            reminder_broker.notify_changed(self.user_id)
+            invalidate_user_refdata(self.user_id)
+            bump_data_version(self.user_id)
+        
+        # Nạp lịch nhắc việc cho các task vừa nhập
+        due_scheduler.reload_user(self.db, self.user_id)
+        return {"imported": self.imported, "failed": self.failed, "errors": self.errors}
+
+def import_tasks(db: Session, user_id: int, stream: io.TextIOBase, import_format: str) -> dict:
+    """
+    Nhập task từ một luồng văn bản (CSV hoặc JSON lines)
+    """
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f"Định dạng không hỗ trợ: {import_format}")
+    return TaskImporter(db, user_id).run(iter_records(stream, import_format))
+
+if __name__ == "__main__":
+    # python -m app.importer <username> <file.csv|file.jsonl> [csv|jsonl]
+    import time
+    from app.database import SessionLocal
+    from app.models import User
+
+    if len(sys.argv) < 3:
+        sys.exit("Cách dùng: python -m app.importer <username> <file> [csv|jsonl]")
+    username, path = sys.argv[1], sys.argv[2]
+    import_format = sys.argv[3] if len(sys.argv) > 3 else path.rsplit(".", 1)[-1].lower()
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        if not user:
+            sys.exit(f"Không tìm thấy user: {username}")
+        started = time.perf_counter()
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            report = import_tasks(db, user.id, stream, import_format)
+        report["seconds"] = round(time.perf_counter() - started, 3)
+    finally:
+        db.close()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
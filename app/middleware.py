@@ -1,55 +1,163 @@
-# Middleware để xử lý cookie authentication
-from fastapi import Request, HTTPException, status
-from fastapi.security import HTTPBearer
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import RedirectResponse
-from jose import JWTError, jwt
-from app.utils.auth import SECRET_KEY, ALGORITHM
-from app.database import SessionLocal
-from app.models import User
-
-class CookieAuthMiddleware(BaseHTTPMiddleware):
-    """
-    Middleware để xử lý authentication qua cookie
-    """
-    
-    # Danh sách các path không cần authentication
-    PUBLIC_PATHS = {
-        "/", "/login", "/register", "/static", "/docs", "/redoc", "/openapi.json"
-    }
-    
-    async def dispatch(self, request: Request, call_next):
-        # Kiểm tra nếu path không cần authentication
-        path = request.url.path
-        if any(path.startswith(public_path) for public_path in self.PUBLIC_PATHS):
-            return await call_next(request)
-        
-        # Lấy token từ cookie
-        token = request.cookies.get("access_token")
+# Middleware để xử lý cookie authentication và nén response
+import os
+import re
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse, RedirectResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.utils.auth import get_cached_principal, get_principal_from_token
+
+# Brotli là dependency tùy chọn (pip install brotli), không có thì chỉ dùng gzip
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Các path không cần authentication (khớp chính xác)
+PUBLIC_PATHS = (
+    "/", "/login", "/register", "/logout", "/token", "/docs", "/redoc", "/openapi.json",
+    "/metrics"
+)
+# Các tiền tố path không cần authentication
+PUBLIC_PREFIXES = ("/static/", "/docs/")
+
+# Biên dịch sẵn thành một regex để kiểm tra trong một lần so khớp
+_PUBLIC_PATH_RE = re.compile(
+    "(?:%s)$|(?:%s)" % (
+        "|".join(re.escape(path) for path in PUBLIC_PATHS),
+        "|".join(re.escape(prefix) for prefix in PUBLIC_PREFIXES),
+    )
+)
+
+def is_public_path(path: str) -> bool:
+    """
+    Kiểm tra path có nằm trong danh sách không cần đăng nhập
+    """
+    return _PUBLIC_PATH_RE.match(path) is not None
+
+def wants_json_error(connection: HTTPConnection) -> bool:
+    """
+    Request của API client: path /api/, có header Authorization hoặc yêu cầu JSON
+    """
+    return (
+        connection.url.path.startswith("/api/")
+        or "authorization" in connection.headers
+        or "application/json" in connection.headers.get("accept", "")
+    )
+
+class CookieAuthMiddleware:
+    """
+    Middleware ASGI thuần để xử lý authentication qua cookie
+    (không dùng BaseHTTPMiddleware để tránh chi phí tạo task / bọc stream mỗi request)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Chỉ xử lý HTTP request, path public đi thẳng vào app
+        if scope["type"] != "http" or is_public_path(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        # Lấy token từ cookie, hoặc từ header Authorization cho API client
+        connection = HTTPConnection(scope)
+        token = connection.cookies.get("access_token")
+        if not token:
+            token = connection.headers.get("authorization")
+
         if token:
+            # Loại bỏ "Bearer " prefix nếu có
+            if token.startswith("Bearer "):
+                token = token[7:]
+
+            # Lấy user từ cache theo token; khi cache miss, decode token và
+            # query database trong threadpool để không chặn event loop
+            user = get_cached_principal(token)
+            if user is None:
+                user = await run_in_threadpool(get_principal_from_token, token)
+            if user:
+                # Thêm user vào request state
+                scope.setdefault("state", {})["user"] = user
+                await self.app(scope, receive, send)
+                return
+
+        # Không có token hoặc token không hợp lệ: API client nhận 401 JSON,
+        # trang HTML được redirect về login
+        if wants_json_error(connection):
+            response = JSONResponse(
+                {"detail": "Could not validate credentials"},
+                status_code=401,
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        else:
+            response = RedirectResponse(url="/login", status_code=303)
+        await response(scope, receive, send)
+
+# Response nhỏ hơn ngưỡng này (byte) không nén vì không đáng chi phí CPU
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Mức nén cho response động: ưu tiên tốc độ hơn tỉ lệ nén
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+def parse_accept_encoding(header: str) -> set:
+    """
+    Lấy tập các encoding client chấp nhận từ header Accept-Encoding (bỏ q=0)
+    """
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
             try:
-                # Loại bỏ "Bearer " prefix nếu có
-                if token.startswith("Bearer "):
-                    token = token[7:]
-                
-                # Decode token
-                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-                username = payload.get("sub")
-                
-                if username:
-                    # Lấy user từ database
-                    db = SessionLocal()
-                    try:
-                        user = db.query(User).filter(User.username == username).first()
-                        if user:
-                            # Thêm user vào request state
-                            request.state.user = user
-                            return await call_next(request)
-                    finally:
-                        db.close()
-                        
-            except JWTError:
-                pass
-        
-        # Nếu không có token hoặc token không hợp lệ, redirect về login
-        return RedirectResponse(url="/login", status_code=303)
\ No newline at end of file
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(name)
+    return encodings
+
+class BrotliResponder(IdentityResponder):
+    """
+    Nén body response bằng brotli (hỗ trợ cả streaming response)
+    """
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        # Streaming: flush từng chunk để client nhận dữ liệu ngay
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI nén response động lớn hơn ngưỡng: brotli nếu client hỗ trợ
+    và đã cài brotli, ngược lại gzip. Response đã có Content-Encoding (file
+    tĩnh nén sẵn) và text/event-stream được giữ nguyên
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = parse_accept_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            responder = BrotliResponder(self.app, self.minimum_size, BROTLI_QUALITY)
+        elif "gzip" in accepted:
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=GZIP_LEVEL)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -0,0 +1,154 @@
+# Quản lý migration schema cho database SQLite
+# Base.metadata.create_all chỉ tạo bảng mới, không thêm index vào database đã có,
+# nên các thay đổi schema được ghi lại thành các migration có đánh số phiên bản.
+# Phiên bản hiện tại lưu trong PRAGMA user_version của file SQLite.
+import sys
+from sqlalchemy.engine import Engine
+
+# Danh sách migration theo thứ tự: (phiên bản, mô tả, các câu lệnh SQL)
+# Chỉ thêm migration mới vào cuối danh sách, không sửa migration đã phát hành
+MIGRATIONS = [
+    (
+        1,
+        "Thêm composite index cho các query task thường dùng",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_tasks_user_created ON tasks (user_id, created_at)",
+            "CREATE INDEX IF NOT EXISTS ix_tasks_user_status_due ON tasks (user_id, status, due_date)",
+            "CREATE INDEX IF NOT EXISTS ix_tasks_user_subject ON tasks (user_id, subject_id)",
+            "CREATE INDEX IF NOT EXISTS ix_tasks_user_label ON tasks (user_id, label_id)",
+            "CREATE INDEX IF NOT EXISTS ix_subjects_user_id ON subjects (user_id)",
+            "CREATE INDEX IF NOT EXISTS ix_labels_user_id ON labels (user_id)",
+            "ANALYZE",
+        ],
+    ),
+    (
+        2,
+        "Thêm bảng FTS5 tìm kiếm toàn văn cho title/note của task",
+        [
+            # Bảng external content: chỉ lưu index, nội dung đọc từ bảng tasks
+            "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+            "title, note, content='tasks', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+            # Trigger giữ index đồng bộ khi tạo / sửa / xóa task
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+            "INSERT INTO tasks_fts(rowid, title, note) VALUES (new.id, new.title, new.note); "
+            "END",
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+            "INSERT INTO tasks_fts(tasks_fts, rowid, title, note) "
+            "VALUES ('delete', old.id, old.title, old.note); "
+            "END",
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, note ON tasks BEGIN "
+            "INSERT INTO tasks_fts(tasks_fts, rowid, title, note) "
+            "VALUES ('delete', old.id, old.title, old.note); "
+            "INSERT INTO tasks_fts(rowid, title, note) VALUES (new.id, new.title, new.note); "
+            "END",
+            # Đánh index cho các task đã có
+            "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+        ],
+    ),
+    (
+        3,
+        "Thêm index (status, due_date) cho bộ lập lịch nhắc việc",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_tasks_status_due ON tasks (status, due_date)",
+            "ANALYZE",
+        ],
+    ),
+]
+
+# Các query tiêu biểu trong controllers và index mà planner cần dùng
+QUERY_PLAN_CHECKS = [
+    (
+        "Danh sách task (sắp xếp theo created_at)",
+        "SELECT id FROM tasks WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT 21",
+        (1,),
+        "ix_tasks_user_created",
+    ),
+    (
+        "Task quá hạn / đến hạn hôm nay",
+        "SELECT id FROM tasks WHERE user_id = ? AND status = 'todo' "
+        "AND due_date >= ? AND due_date < ? ORDER BY due_date ASC",
+        (1, "2024-01-01", "2024-01-02"),
+        "ix_tasks_user_status_due",
+    ),
+    (
+        "Lọc task theo chủ đề",
+        "SELECT id FROM tasks WHERE user_id = ? AND subject_id = ?",
+        (1, 1),
+        "ix_tasks_user_subject",
+    ),
+    (
+        "Lọc task theo nhãn",
+        "SELECT id FROM tasks WHERE user_id = ? AND label_id = ?",
+        (1, 1),
+        "ix_tasks_user_label",
+    ),
+    (
+        "Nạp hạn chót sắp tới cho bộ lập lịch (mọi user)",
+        "SELECT id, user_id, due_date FROM tasks WHERE status = 'todo' "
+        "AND due_date >= ? AND due_date < ? ORDER BY due_date, id LIMIT 1000",
+        ("2024-01-01", "2024-01-02"),
+        "ix_tasks_status_due",
+    ),
+]
+
+def get_schema_version(engine: Engine) -> int:
+    """
+    Lấy phiên bản schema hiện tại của database
+    """
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+def run_migrations(engine: Engine) -> int:
+    """
+    Áp dụng các migration chưa chạy, mỗi migration trong một transaction
+    Trả về phiên bản schema sau khi chạy
+    """
+    current = get_schema_version(engine)
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+            conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+        current = version
+    return current
+
+def explain_query_plan(engine: Engine, sql: str, params=()) -> list:
+    """
+    Trả về các dòng mô tả của EXPLAIN QUERY PLAN cho một câu SQL
+    """
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[-1] for row in rows]
+
+def check_query_plans(engine: Engine) -> list:
+    """
+    Kiểm tra planner có dùng đúng index cho các query tiêu biểu
+    Trả về danh sách (mô tả, index mong đợi, plan) của các query không đạt
+    """
+    failures = []
+    for description, sql, params, index_name in QUERY_PLAN_CHECKS:
+        plan = explain_query_plan(engine, sql, params)
+        if not any(index_name in line for line in plan):
+            failures.append((description, index_name, plan))
+    return failures
+
+if __name__ == "__main__":
+    # python -m app.migrations          -> áp dụng migration
+    # python -m app.migrations --check  -> áp dụng migration và kiểm tra query plan
+    from app.database import engine
+    from app.models import Base
+
+    Base.metadata.create_all(bind=engine)
+    version = run_migrations(engine)
+    print(f"Schema version: {version}")
+
+    if "--check" in sys.argv:
+        failures = check_query_plans(engine)
+        for description, index_name, plan in failures:
+            print(f"FAIL {description}: không dùng {index_name} -> {plan}")
+        if failures:
+            sys.exit(1)
+        print(f"OK: {len(QUERY_PLAN_CHECKS)} query dùng đúng index")
@@ -1,5 +1,5 @@
 # Các model của database
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -27,6 +27,9 @@ class Subject(Base):
     Model Subject - Chủ đề công việc
     """
     __tablename__ = "subjects"
+    __table_args__ = (
+        Index("ix_subjects_user_id", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -44,6 +47,9 @@ class Label(Base):
     Model Label - Nhãn cho công việc
     """
     __tablename__ = "labels"
+    __table_args__ = (
+        Index("ix_labels_user_id", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50), nullable=False)
@@ -60,6 +66,15 @@ class Task(Base):
     Model Task - Công việc cần làm
     """
     __tablename__ = "tasks"
+    # Index theo các điều kiện lọc thực tế trong controllers (luôn bắt đầu bằng user_id)
+    # Khi thêm index mới, nhớ thêm migration tương ứng trong app/migrations.py
+    __table_args__ = (
+        Index("ix_tasks_user_created", "user_id", "created_at"),
+        Index("ix_tasks_user_status_due", "user_id", "status", "due_date"),
+        Index("ix_tasks_user_subject", "user_id", "subject_id"),
+        Index("ix_tasks_user_label", "user_id", "label_id"),
+        Index("ix_tasks_status_due", "status", "due_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -27,6 +27,14 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+# ===== TASK COUNT SCHEMAS =====
+class TaskCounts(BaseModel):
+    """Schema số lượng task theo trạng thái của một subject / label"""
+    total: int = 0
+    open: int = 0
+    done: int = 0
+    overdue: int = 0
+
 # ===== SUBJECT SCHEMAS =====
 class SubjectBase(BaseModel):
     """Schema cơ bản cho Subject"""
@@ -51,6 +59,10 @@ class Subject(SubjectBase):
     class Config:
         from_attributes = True
 
+class SubjectWithCounts(Subject):
+    """Schema trả về Subject kèm số lượng task"""
+    task_counts: TaskCounts
+
 # ===== LABEL SCHEMAS =====
 class LabelBase(BaseModel):
     """Schema cơ bản cho Label"""
@@ -75,6 +87,10 @@ class Label(LabelBase):
     class Config:
         from_attributes = True
 
+class LabelWithCounts(Label):
+    """Schema trả về Label kèm số lượng task"""
+    task_counts: TaskCounts
+
 # ===== TASK SCHEMAS =====
 class TaskBase(BaseModel):
     """Schema cơ bản cho Task"""
@@ -112,6 +128,55 @@ class Task(TaskBase):
     class Config:
         from_attributes = True
 
+class TaskPage(BaseModel):
+    """Schema trả về một trang task (phân trang theo cursor)"""
+    items: List[Task]
+    next_cursor: Optional[str] = None
+
+class TaskSearchResult(Task):
+    """Schema trả về kết quả tìm kiếm task (kèm điểm liên quan và đoạn trích)"""
+    score: Optional[float] = None
+    snippet: Optional[str] = None
+
+class TaskBulkAction(BaseModel):
+    """Schema thao tác hàng loạt trên nhiều task"""
+    task_ids: List[int]
+    action: str  # done, todo, move, label, delete
+    subject_id: Optional[int] = None  # dùng cho action "move"
+    label_id: Optional[int] = None  # dùng cho action "label", None = bỏ nhãn
+
+class TaskBulkResult(BaseModel):
+    """Schema kết quả thao tác hàng loạt"""
+    action: str
+    affected: int
+
+class TaskStats(BaseModel):
+    """Schema bộ đếm trên dashboard"""
+    total_tasks: int
+    todo_tasks: int
+    done_tasks: int
+    due_today_count: int
+    overdue_count: int
+
+class TaskActionResult(BaseModel):
+    """Schema kết quả toggle / sửa / xóa một task (kèm bộ đếm dashboard mới)"""
+    id: int
+    status: Optional[str] = None
+    deleted: bool = False
+    task: Optional[Task] = None
+    stats: TaskStats
+
+class TaskImportError(BaseModel):
+    """Schema lỗi của một dòng khi nhập task"""
+    line: int
+    error: str
+
+class TaskImportResult(BaseModel):
+    """Schema kết quả nhập task từ file"""
+    imported: int
+    failed: int
+    errors: List[TaskImportError] = []
+
 # ===== AUTH SCHEMAS =====
 class Token(BaseModel):
     """Schema cho JWT token"""
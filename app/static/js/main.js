@@ -10,8 +10,14 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeAutoHideAlerts();
     initializeDateInputs();
     initializeColorPickers();
+    initializeBulkActions();
+    initializeInlineTaskActions();
+    initializeLiveEvents();
 });
 
+// Media type để server trả về một dòng task dạng HTML (khớp với controllers/tasks.py)
+const TASK_FRAGMENT_TYPE = 'text/vnd.todo.task-fragment+html';
+
 /**
  * Khởi tạo Bootstrap tooltips
  */
@@ -26,13 +32,11 @@ function initializeTooltips() {
  * Khởi tạo xác nhận trước khi xóa
  */
 function initializeConfirmations() {
-    // Xác nhận xóa task
-    document.querySelectorAll('.delete-task').forEach(function(button) {
-        button.addEventListener('click', function(e) {
-            if (!confirm('Bạn có chắc chắn muốn xóa công việc này?')) {
-                e.preventDefault();
-            }
-        });
+    // Xác nhận xóa task (ủy quyền sự kiện: áp dụng cả cho dòng task được thay tại chỗ)
+    document.addEventListener('click', function(e) {
+        if (e.target.closest('.delete-task') && !confirm('Bạn có chắc chắn muốn xóa công việc này?')) {
+            e.preventDefault();
+        }
     });
     
     // Xác nhận xóa subject
@@ -138,14 +142,19 @@ function toggleTaskStatus(taskId) {
     fetch(`/tasks/${taskId}/toggle`, {
         method: 'POST',
         headers: {
-            'Content-Type': 'application/json',
+            'Accept': TASK_FRAGMENT_TYPE,
         }
     })
     .then(response => {
-        if (response.ok) {
-            location.reload();
-        } else {
-            alert('Có lỗi xảy ra khi cập nhật trạng thái công việc');
+        if (!response.ok) {
+            throw new Error(response.status);
+        }
+        return response.text();
+    })
+    .then(html => {
+        const item = document.querySelector(`[data-task-id="${taskId}"]`);
+        if (item) {
+            item.outerHTML = html;
         }
     })
     .catch(error => {
@@ -338,4 +347,149 @@ function exportTasks() {
     link.href = URL.createObjectURL(blob);
     link.download = 'tasks.csv';
     link.click();
-}
\ No newline at end of file
+}
+
+/**
+ * Khởi tạo thanh thao tác hàng loạt trên danh sách công việc
+ */
+function initializeBulkActions() {
+    const form = document.getElementById('bulk-form');
+    if (!form) return;
+    
+    const selectAll = document.getElementById('bulk-select-all');
+    const action = document.getElementById('bulk-action');
+    const subject = document.getElementById('bulk-subject');
+    const label = document.getElementById('bulk-label');
+    const submit = document.getElementById('bulk-submit');
+    const count = document.getElementById('bulk-count');
+    
+    function updateState() {
+        const selected = document.querySelectorAll('.bulk-select:checked').length;
+        count.textContent = selected;
+        submit.disabled = selected === 0;
+        selectAll.checked = selected > 0 && selected === document.querySelectorAll('.bulk-select').length;
+    }
+    
+    function updateAction() {
+        // Chỉ gửi trường cần thiết cho thao tác đang chọn
+        subject.classList.toggle('d-none', action.value !== 'move');
+        subject.disabled = action.value !== 'move';
+        label.classList.toggle('d-none', action.value !== 'label');
+        label.disabled = action.value !== 'label';
+    }
+    
+    selectAll.addEventListener('change', function() {
+        document.querySelectorAll('.bulk-select').forEach(function(checkbox) {
+            checkbox.checked = selectAll.checked;
+        });
+        updateState();
+    });
+    // Ủy quyền sự kiện để checkbox của dòng task được thay tại chỗ vẫn hoạt động
+    document.addEventListener('change', function(e) {
+        if (e.target.classList.contains('bulk-select')) {
+            updateState();
+        }
+    });
+    action.addEventListener('change', updateAction);
+    
+    form.addEventListener('submit', function(e) {
+        if (action.value === 'delete' && !confirm('Bạn có chắc chắn muốn xóa các công việc đã chọn?')) {
+            e.preventDefault();
+        }
+    });
+    
+    updateAction();
+    updateState();
+}
+
+/**
+ * Toggle / xóa task tại chỗ: form có data-inline="fragment" thay dòng task bằng
+ * HTML server trả về, data-inline="json" cập nhật bộ đếm và bỏ dòng khỏi danh sách
+ */
+function initializeInlineTaskActions() {
+    document.addEventListener('submit', function(e) {
+        const form = e.target;
+        const mode = form.dataset.inline;
+        if (!mode) return;
+        
+        e.preventDefault();
+        const item = form.closest('[data-task-id]');
+        fetch(form.action, {
+            method: 'POST',
+            body: new FormData(form),
+            headers: {
+                'Accept': mode === 'json' ? 'application/json' : TASK_FRAGMENT_TYPE,
+            }
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return mode === 'json' ? response.json() : response.text();
+        })
+        .then(result => {
+            if (mode === 'json') {
+                applyTaskStats(result.stats);
+                if (item) item.remove();
+            } else if (item) {
+                if (result.trim()) {
+                    item.outerHTML = result;
+                } else {
+                    item.remove();
+                }
+            }
+        })
+        .catch(error => {
+            // Lỗi: quay về gửi form thông thường (tải lại trang)
+            console.error('Error:', error);
+            form.submit();
+        });
+    });
+}
+
+/**
+ * Cập nhật các bộ đếm có thuộc tính data-stat trên trang
+ */
+function applyTaskStats(stats) {
+    if (!stats) return;
+    document.querySelectorAll('[data-stat]').forEach(function(element) {
+        const value = stats[element.dataset.stat];
+        if (value !== undefined) {
+            element.textContent = value;
+        }
+    });
+}
+
+/**
+ * Nhận bộ đếm công việc được server đẩy qua Server-Sent Events (trang có data-live-events)
+ * và báo ngay khi một công việc đến hạn hôm nay / quá hạn, không cần tải lại trang
+ */
+function initializeLiveEvents() {
+    if (!document.querySelector('[data-live-events]') || !window.EventSource) return;
+    
+    const source = new EventSource('/notifications/stream');
+    source.addEventListener('stats', function(e) {
+        applyTaskStats(JSON.parse(e.data));
+    });
+    source.addEventListener('reminder', function(e) {
+        const reminder = JSON.parse(e.data);
+        const title = escapeHtml(reminder.title);
+        if (reminder.kind === 'overdue') {
+            showToast(`Công việc "${title}" đã quá hạn`, 'warning');
+        } else {
+            showToast(`Công việc "${title}" đến hạn hôm nay`, 'warning');
+        }
+    });
+    window.addEventListener('beforeunload', function() {
+        source.close();
+    });
+}
+
+/**
+ * Escape chuỗi trước khi chèn vào HTML
+ */
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
@@ -0,0 +1,62 @@
+# Cấu hình Jinja2 dùng chung cho toàn bộ ứng dụng
+# Một environment duy nhất: mỗi template chỉ biên dịch một lần, bytecode được
+# lưu ra đĩa để lần khởi động sau (sau deploy) không phải biên dịch lại
+import os
+import time
+from typing import List
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from app.assets import asset_url
+from app.database import DATABASE_PROFILE
+from app.utils.metrics import TEMPLATE_RENDER_SECONDS
+from app.utils.profiler import get_current_profile
+
+TEMPLATES_DIR = "app/templates"
+# Thư mục lưu bytecode của template đã biên dịch
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", "./.jinja_cache")
+# Tự kiểm tra file template thay đổi mỗi lần render: tiện khi phát triển,
+# tắt mặc định ở profile production (đổi qua TEMPLATE_AUTO_RELOAD=0/1)
+TEMPLATE_AUTO_RELOAD = os.getenv(
+    "TEMPLATE_AUTO_RELOAD", "0" if DATABASE_PROFILE == "production" else "1"
+) != "0"
+
+def create_template_env() -> Environment:
+    """
+    Tạo Jinja2 environment với bytecode cache trên đĩa
+    """
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        auto_reload=TEMPLATE_AUTO_RELOAD,
+        bytecode_cache=FileSystemBytecodeCache(TEMPLATE_CACHE_DIR),
+        # Giữ toàn bộ template đã biên dịch trong bộ nhớ
+        cache_size=-1,
+    )
+    env.globals["asset_url"] = asset_url
+    env.globals["sql_profile"] = get_current_profile
+    return env
+
+class TimedTemplates(Jinja2Templates):
+    """
+    Jinja2Templates có đo thời gian render từng template
+    """
+
+    def TemplateResponse(self, *args, **kwargs):
+        name = kwargs.get("name") or next((arg for arg in args if isinstance(arg, str)), "unknown")
+        started = time.perf_counter()
+        response = super().TemplateResponse(*args, **kwargs)
+        TEMPLATE_RENDER_SECONDS.observe(time.perf_counter() - started, (name,))
+        return response
+
+templates = TimedTemplates(env=create_template_env())
+
+def precompile_templates() -> List[str]:
+    """
+    Nạp (biên dịch) trước toàn bộ template khi khởi động để request đầu tiên
+    không phải chờ biên dịch
+    """
+    names = [name for name in templates.env.list_templates() if name.endswith(".html")]
+    for name in names:
+        templates.env.get_template(name)
+    return names
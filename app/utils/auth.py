@@ -1,14 +1,21 @@
 # Tiện ích xử lý authentication và bảo mật
+import os
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import event
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.models import User
-from app.schemas import TokenData
+from app.schemas import TokenData, User as UserSchema
+from app.utils.cache import TTLCache
+from app.utils.etag import bump_data_version
+from app.utils.password_pool import password_pool
 
 # Cấu hình mã hóa mật khẩu
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -21,17 +28,26 @@ SECRET_KEY = "your-secret-key-here"  # Trong thực tế nên đặt trong .env
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Cache user đã xác thực theo token: bỏ qua verify HMAC và query users
+# Mỗi phần tử hết hạn cùng token, tối đa PRINCIPAL_CACHE_TTL giây
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+
+_principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Xác minh mật khẩu người dùng nhập với mật khẩu đã hash
+    Chạy trong pool bcrypt riêng, raise PasswordHashPoolBusy nếu pool đầy
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_pool.run(pwd_context.verify, plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """
     Mã hóa mật khẩu bằng bcrypt
+    Chạy trong pool bcrypt riêng, raise PasswordHashPoolBusy nếu pool đầy
     """
-    return pwd_context.hash(password)
+    return password_pool.run(pwd_context.hash, password)
 
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """
@@ -44,6 +60,37 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
         return None
     return user
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Như verify_password nhưng chờ bằng await (dùng trong handler async)
+    """
+    return await password_pool.run_async(pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Như get_password_hash nhưng chờ bằng await (dùng trong handler async)
+    """
+    return await password_pool.run_async(pwd_context.hash, password)
+
+def _find_user(username: str) -> Optional[User]:
+    """
+    Đọc user bằng session riêng rồi đóng ngay: trả kết nối về pool trước khi chờ bcrypt
+    """
+    with SessionLocal() as db:
+        return db.query(User).filter(User.username == username).first()
+
+async def authenticate_user_async(username: str, password: str) -> Optional[User]:
+    """
+    Xác thực người dùng trong handler async: query trong threadpool, bcrypt chờ bằng
+    await nên không giữ thread lẫn kết nối database. User trả về đã tách khỏi session
+    """
+    user = await run_in_threadpool(_find_user, username)
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
     Tạo JWT access token
@@ -57,7 +104,68 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(request: Request, db: Session = Depends(get_db)):
+def get_cached_principal(token: str) -> Optional[UserSchema]:
+    """
+    Lấy principal đã cache theo token (không decode token, không query database)
+    """
+    return _principal_cache.get(token)
+
+def get_principal_from_token(token: str, db: Optional[Session] = None) -> Optional[UserSchema]:
+    """
+    Lấy thông tin user (bản sao tách khỏi session) từ JWT token
+    Dùng cache theo token; chỉ decode token và query database khi cache miss
+    Trả về None nếu token không hợp lệ hoặc user không tồn tại
+    """
+    principal = _principal_cache.get(token)
+    if principal is not None:
+        return principal
+    
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    username = payload.get("sub")
+    if not username:
+        return None
+    
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        if not user:
+            return None
+        principal = UserSchema.model_validate(user)
+    finally:
+        if own_session:
+            db.close()
+    
+    # Không giữ lâu hơn thời hạn của token
+    ttl = PRINCIPAL_CACHE_TTL
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        _principal_cache.set(token, principal, ttl=ttl)
+    return principal
+
+def invalidate_user_principals(user_id: int) -> None:
+    """
+    Xóa mọi principal đã cache của user (khi user bị sửa hoặc xóa)
+    """
+    _principal_cache.discard_where(lambda token, principal: principal.id == user_id)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal_on_change(mapper, connection, target):
+    """
+    Tự động xóa cache principal khi bản ghi User thay đổi
+    """
+    invalidate_user_principals(target.id)
+    # Thông tin user hiển thị trên mọi trang: ETag cũ không còn hợp lệ
+    bump_data_version(target.id)
+
+def get_current_user(request: Request, db: Session = Depends(get_db)):
     """
     Lấy thông tin user hiện tại từ JWT token (cookie hoặc header)
     """
@@ -85,23 +193,14 @@ async def get_current_user(request: Request, db: Session = Depends(get_db)):
     if not token:
         raise credentials_exception
     
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = get_principal_from_token(token, db)
     if user is None:
         raise credentials_exception
     return user
 
-async def get_current_active_user(request: Request, db: Session = Depends(get_db)):
+def get_current_active_user(request: Request, db: Session = Depends(get_db)):
     """
     Lấy thông tin user hiện tại đang active
     """
-    current_user = await get_current_user(request, db)
+    current_user = get_current_user(request, db)
     return current_user
\ No newline at end of file
@@ -0,0 +1,75 @@
+# Bộ nhớ đệm trong tiến trình (in-process) dùng chung cho ứng dụng
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Cache key-value an toàn luồng, giới hạn số phần tử (loại bỏ theo LRU)
+    và có thời gian sống (TTL) cho từng phần tử
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (thời điểm hết hạn hoặc None, value)
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Lấy giá trị theo key, trả về default nếu không có hoặc đã hết hạn
+        """
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Lưu giá trị; ttl (giây) ghi đè TTL mặc định của cache
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key: Hashable) -> None:
+        """
+        Xóa một key khỏi cache (không báo lỗi nếu không tồn tại)
+        """
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        Xóa các phần tử thỏa predicate(key, value), trả về số phần tử đã xóa
+        Duyệt toàn bộ cache nên chỉ dùng cho thao tác hiếm (vd: user bị sửa / xóa)
+        """
+        with self._lock:
+            keys = [key for key, (_, value) in self._data.items() if predicate(key, value)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+    
+    def clear(self) -> None:
+        """
+        Xóa toàn bộ cache
+        """
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
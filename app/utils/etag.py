@@ -0,0 +1,78 @@
+# ETag / conditional GET theo phiên bản dữ liệu của từng user
+# Mỗi thao tác ghi subject / label / task tăng phiên bản dữ liệu của user;
+# ETag của response được tính từ phiên bản này nên request có If-None-Match
+# trùng khớp được trả về 304 trước khi query database hay render template
+import hashlib
+import os
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Tắt bằng ETAG_ENABLED=0 (phiên bản lưu trong tiến trình, nên khi chạy nhiều
+# worker mà không có sticky session thì client có thể nhận 304 cho dữ liệu cũ)
+ETAG_ENABLED = os.getenv("ETAG_ENABLED", "1") != "0"
+# Các trang có dữ liệu phụ thuộc thời gian (quá hạn, đến hạn hôm nay),
+# nên ETag đổi sau mỗi khoảng này kể cả khi không có thao tác ghi
+ETAG_TIME_BUCKET_SECONDS = int(os.getenv("ETAG_TIME_BUCKET_SECONDS", "60"))
+
+# Mã tiến trình: ETag cũ không còn khớp sau khi khởi động lại
+_process_epoch = uuid.uuid4().hex[:8]
+_versions: Dict[int, int] = {}
+_lock = threading.Lock()
+
+def bump_data_version(user_id: int) -> None:
+    """
+    Tăng phiên bản dữ liệu của user (gọi sau mỗi thao tác ghi)
+    """
+    with _lock:
+        _versions[user_id] = _versions.get(user_id, 0) + 1
+
+def get_data_version(user_id: int) -> int:
+    """
+    Phiên bản dữ liệu hiện tại của user
+    """
+    return _versions.get(user_id, 0)
+
+def make_etag(request: Request, user_id: int) -> str:
+    """
+    Tính ETag cho request của user từ phiên bản dữ liệu, URL và mốc thời gian
+    """
+    time_bucket = int(time.time() // ETAG_TIME_BUCKET_SECONDS)
+    key = f"{request.url.path}?{request.url.query}|{get_data_version(user_id)}|{time_bucket}"
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return f'W/"{_process_epoch}-{user_id}-{digest}"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """
+    Kiểm tra header If-None-Match có chứa etag không (so sánh yếu)
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [value.strip() for value in header.split(",")]
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any(candidate in (etag, bare) or candidate == f"W/{bare}" for candidate in candidates)
+
+def check_not_modified(request: Request, user_id: int) -> Optional[Response]:
+    """
+    Trả về response 304 nếu client đã có bản mới nhất, ngược lại trả về None
+    """
+    if not ETAG_ENABLED:
+        return None
+    etag = make_etag(request, user_id)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=etag_headers(request, user_id))
+    return None
+
+def etag_headers(request: Request, user_id: int) -> dict:
+    """
+    Header ETag và Cache-Control cho response trang / API của user
+    """
+    if not ETAG_ENABLED:
+        return {}
+    return {"ETag": make_etag(request, user_id), "Cache-Control": "private, no-cache"}
@@ -0,0 +1,131 @@
+# Kênh đẩy sự kiện nhắc việc (Server-Sent Events)
+# Một broker dùng chung cho mọi kết nối: bộ đếm của mỗi user chỉ được tính một
+# lần cho mỗi thay đổi rồi phát cùng một chuỗi sự kiện tới tất cả kết nối của
+# user đó, nên chi phí mỗi kết nối chỉ là một hàng đợi đang chờ
+import asyncio
+import json
+import os
+from typing import Dict, Optional, Set
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal
+from app.utils.stats import get_task_stats
+from app.utils.metrics import Gauge, registry
+
+# Gộp nhiều thay đổi liên tiếp (ví dụ import, thao tác hàng loạt) thành một lần tính
+EVENTS_COALESCE_SECONDS = float(os.getenv("EVENTS_COALESCE_SECONDS", "0.25"))
+# Số sự kiện tối đa chờ gửi cho mỗi kết nối; client chậm chỉ mất sự kiện cũ
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "16"))
+# Gửi comment giữ kết nối khi không có sự kiện (giây)
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "25"))
+
+def format_event(event: str, data: dict) -> str:
+    """
+    Mã hóa một sự kiện theo định dạng text/event-stream
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _load_task_stats(user_id: int) -> dict:
+    """
+    Tính bộ đếm dashboard của user với session riêng (chạy trong threadpool)
+    """
+    db = SessionLocal()
+    try:
+        return get_task_stats(db, user_id)
+    finally:
+        db.close()
+
+class ReminderBroker:
+    """
+    Phát sự kiện bộ đếm / nhắc việc tới các kết nối SSE, nhóm theo user
+    """
+
+    def __init__(self, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._last_stats: Dict[int, dict] = {}
+        self._pending: Set[int] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def connection_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """
+        Đăng ký một kết nối mới của user (gọi trong event loop)
+        """
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+
+        # Kết nối mới nhận ngay bộ đếm hiện tại
+        if user_id in self._last_stats:
+            queue.put_nowait(format_event("stats", self._last_stats[user_id]))
+        else:
+            self._schedule_refresh(user_id)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        """
+        Hủy đăng ký khi kết nối đóng
+        """
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+            self._last_stats.pop(user_id, None)
+
+    def notify_changed(self, user_id: int) -> None:
+        """
+        Báo dữ liệu task của user đã thay đổi (gọi được từ thread bất kỳ)
+        Không làm gì nếu user không có kết nối nào đang mở
+        """
+        loop = self._loop
+        if user_id not in self._subscribers or loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._schedule_refresh, user_id)
+
+    def publish(self, user_id: int, message: str) -> None:
+        """
+        Gửi một sự kiện đã mã hóa tới mọi kết nối của user (gọi trong event loop)
+        """
+        for queue in self._subscribers.get(user_id, ()):
+            if queue.full():
+                # Client không đọc kịp: bỏ sự kiện cũ nhất
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    def publish_reminder(self, user_id: int, reminder: dict) -> None:
+        """
+        Gửi sự kiện task vừa chuyển sang đến hạn hôm nay / quá hạn (gọi trong event loop)
+        """
+        if user_id in self._subscribers:
+            self.publish(user_id, format_event("reminder", reminder))
+
+    def _schedule_refresh(self, user_id: int) -> None:
+        if user_id in self._pending or user_id not in self._subscribers:
+            return
+        self._pending.add(user_id)
+        self._loop.create_task(self._refresh(user_id))
+
+    async def _refresh(self, user_id: int) -> None:
+        """
+        Tính lại bộ đếm của user (một lần cho mọi kết nối) và phát nếu có thay đổi
+        """
+        try:
+            await asyncio.sleep(EVENTS_COALESCE_SECONDS)
+        finally:
+            self._pending.discard(user_id)
+        if user_id not in self._subscribers:
+            return
+        stats = await run_in_threadpool(_load_task_stats, user_id)
+        if user_id not in self._subscribers or stats == self._last_stats.get(user_id):
+            return
+        self._last_stats[user_id] = stats
+        self.publish(user_id, format_event("stats", stats))
+
+reminder_broker = ReminderBroker()
+
+SSE_CONNECTIONS = registry.register(Gauge("sse_connections", "Số kết nối Server-Sent Events đang mở"))
+SSE_CONNECTIONS.set_function(reminder_broker.connection_count)
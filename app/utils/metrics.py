@@ -0,0 +1,306 @@
+# Thu thập số liệu vận hành và xuất theo định dạng text của Prometheus (/metrics)
+# Tự cài đặt counter / gauge / histogram đơn giản (không cần prometheus_client):
+# mỗi lần ghi chỉ tốn một lock và một phép tìm nhị phân, đủ rẻ để luôn bật
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Tắt bằng METRICS_ENABLED=0
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+# /metrics yêu cầu header "Authorization: Bearer <METRICS_TOKEN>"; khi chưa đặt token
+# thì /metrics trả 404, trừ khi bật METRICS_PUBLIC=1 (ví dụ chỉ mở trong mạng nội bộ)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "0") == "1"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{%s}" % ",".join(parts) if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """
+    Lớp cơ sở: giá trị được lưu theo bộ giá trị label
+    """
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], object]] = None
+        if not self.label_names and self.metric_type in ("counter", "gauge"):
+            # Metric không có label luôn xuất giá trị, kể cả khi chưa ghi lần nào
+            self._values[()] = 0
+
+    def set_function(self, function: Callable[[], object]) -> None:
+        """
+        Lấy giá trị tại thời điểm scrape từ function: trả về một số,
+        hoặc dict {bộ giá trị label: số} nếu metric có label
+        """
+        self._function = function
+
+    def _items(self) -> list:
+        if self._function is not None:
+            value = self._function()
+            return sorted(value.items()) if isinstance(value, dict) else [((), value)]
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for labels, value in self._items():
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [số lần rơi vào từng bucket (không cộng dồn), tổng, số lần]
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, ([*state[0]], state[1], state[2])) for labels, state in self._values.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+class Registry:
+    """
+    Danh sách metric được xuất ra /metrics
+    """
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "Số request HTTP theo route và mã trạng thái", ("method", "route", "status")
+))
+HTTP_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "Thời gian xử lý request HTTP", ("method", "route")
+))
+HTTP_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "Số request HTTP đang xử lý", ("method",)
+))
+REQUEST_DB_STATEMENTS = registry.register(Histogram(
+    "http_request_db_statements", "Số câu SQL mỗi request", ("route",), buckets=COUNT_BUCKETS
+))
+REQUEST_DB_SECONDS = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Tổng thời gian SQL mỗi request", ("route",)
+))
+DB_STATEMENTS = registry.register(Counter(
+    "db_statements_total", "Số câu SQL đã chạy theo loại", ("operation",)
+))
+DB_STATEMENT_SECONDS = registry.register(Histogram(
+    "db_statement_duration_seconds", "Thời gian chạy mỗi câu SQL", ("operation",), buckets=FAST_BUCKETS
+))
+DB_POOL_CONNECTIONS = registry.register(Gauge(
+    "db_pool_connections", "Kết nối trong pool theo trạng thái", ("state",)
+))
+DB_POOL_WAIT = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Thời gian chờ lấy kết nối từ pool", buckets=FAST_BUCKETS
+))
+PASSWORD_HASH_SECONDS = registry.register(Histogram(
+    "password_hash_duration_seconds", "Thời gian chạy bcrypt (hash / verify)", ("operation",)
+))
+TEMPLATE_RENDER_SECONDS = registry.register(Histogram(
+    "template_render_duration_seconds", "Thời gian render template Jinja2", ("template",), buckets=FAST_BUCKETS
+))
+
+# ===== Số liệu SQL theo request =====
+
+class RequestStats:
+    """
+    Số câu SQL và tổng thời gian SQL của request hiện tại
+    """
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+# Context được sao chép sang threadpool nên các handler `def` vẫn ghi vào đúng request
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+_local = threading.local()
+
+def _statement_operation(statement: str) -> str:
+    keyword = statement.lstrip()[:6].upper()
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Gắn event listener đo câu SQL và thời gian chờ pool cho engine
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Câu SQL đã chạy: nếu có lần checkout thì đã được ghi nhận
+        _local.checkout_started = None
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+        operation = _statement_operation(statement)
+        DB_STATEMENTS.inc((operation,))
+        DB_STATEMENT_SECONDS.observe(elapsed, (operation,))
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        started = getattr(_local, "checkout_started", None)
+        if started is not None:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+            _local.checkout_started = None
+
+    @event.listens_for(Session, "do_orm_execute")
+    def _do_orm_execute(orm_execute_state):
+        # Session lấy kết nối từ pool ngay sau bước này nếu chưa giữ kết nối nào
+        if not orm_execute_state.session.in_transaction():
+            _local.checkout_started = time.perf_counter()
+
+    def _pool_connections():
+        pool = engine.pool
+        if not hasattr(pool, "checkedout"):
+            return {}
+        return {
+            ("checked_out",): pool.checkedout(),
+            ("idle",): pool.checkedin(),
+            ("size",): pool.size(),
+        }
+
+    DB_POOL_CONNECTIONS.set_function(_pool_connections)
+
+# ===== Middleware =====
+
+def _route_label(scope: Scope) -> str:
+    """
+    Dùng mẫu path của route (vd. /tasks/{task_id}/toggle) để số label có giới hạn
+    """
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    if scope["path"].startswith("/static/"):
+        return "/static"
+    return "other"
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI đo số request, thời gian xử lý, request đang chạy và
+    số câu SQL mỗi request
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        streaming = False
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                streaming = Headers(raw=message["headers"]).get("content-type", "").startswith("text/event-stream")
+            await send(message)
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        HTTP_IN_FLIGHT.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec((method,))
+            current_request_stats.reset(token)
+            route = _route_label(scope)
+            HTTP_REQUESTS.inc((method, route, str(status_code)))
+            # Kết nối SSE kéo dài tùy client, không đưa vào histogram độ trễ
+            if not streaming:
+                HTTP_LATENCY.observe(elapsed, (method, route))
+            REQUEST_DB_STATEMENTS.observe(stats.statements, (route,))
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, (route,))
@@ -0,0 +1,123 @@
+# Pool thread riêng cho bcrypt (hash / verify mật khẩu)
+# bcrypt tốn 100-300ms mỗi lần và nhả GIL, nên chạy trong pool riêng có giới hạn
+# để một đợt đăng nhập dồn dập không chiếm hết threadpool phục vụ các trang khác
+# Handler async chờ kết quả bằng run_async: yêu cầu đang chờ không giữ thread
+# của threadpool lẫn kết nối database
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.metrics import Counter, Gauge, PASSWORD_HASH_SECONDS, registry
+
+PASSWORD_POOL_PENDING = registry.register(Gauge(
+    "password_pool_pending", "Số yêu cầu bcrypt đang chạy hoặc chờ"
+))
+PASSWORD_POOL_REJECTED = registry.register(Counter(
+    "password_pool_rejected_total", "Số yêu cầu bcrypt bị từ chối vì pool đầy"
+))
+
+# Số thread bcrypt chạy song song
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Số yêu cầu tối đa được xếp hàng chờ (ngoài các yêu cầu đang chạy). Khi khởi động
+# giới hạn còn bị thu nhỏ theo threadpool (xem limit_to_threadpool)
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "16"))
+
+class PasswordHashPoolBusy(Exception):
+    """
+    Pool bcrypt đã đầy, yêu cầu bị từ chối ngay (trả về 503)
+    """
+    pass
+
+class PasswordHashPool:
+    """
+    Chạy các hàm bcrypt trong pool thread có giới hạn số yêu cầu đang chờ
+    """
+    
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.max_pending = workers + queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+    
+    def _timed(self, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            PASSWORD_HASH_SECONDS.observe(elapsed, (func.__name__,))
+            with self._lock:
+                self._completed += 1
+                self._busy_seconds += elapsed
+    
+    def limit_to_threadpool(self, threadpool_tokens: int) -> None:
+        """
+        Giới hạn số yêu cầu đang chờ theo số thread của threadpool: sau khi có kết quả,
+        mỗi yêu cầu còn cần một thread (query / insert user), nên một đợt đăng nhập
+        được nhận tối đa nửa threadpool, phần còn lại dành cho các trang khác
+        """
+        with self._lock:
+            self.max_pending = min(self.max_pending, max(self.workers, threadpool_tokens // 2))
+    
+    def _acquire(self) -> None:
+        """
+        Giữ một chỗ trong pool, raise PasswordHashPoolBusy nếu đã đạt giới hạn
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                PASSWORD_POOL_REJECTED.inc()
+                raise PasswordHashPoolBusy()
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+    
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+    
+    def run(self, func, *args):
+        """
+        Chạy func(*args) trong pool và chặn thread hiện tại tới khi có kết quả
+        (cho script / code sync). Raise PasswordHashPoolBusy nếu pool đầy
+        """
+        self._acquire()
+        try:
+            return self._executor.submit(self._timed, func, *args).result()
+        finally:
+            self._release()
+    
+    async def run_async(self, func, *args):
+        """
+        Như run nhưng chờ bằng await: không giữ thread nào của threadpool khi chờ
+        """
+        self._acquire()
+        try:
+            return await asyncio.wrap_future(self._executor.submit(self._timed, func, *args))
+        finally:
+            self._release()
+    
+    def metrics(self) -> dict:
+        """
+        Số liệu về mức độ bão hòa của pool
+        """
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "peak_pending": self._peak_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "busy_seconds": round(self._busy_seconds, 3),
+                "saturation": self._pending / self.max_pending,
+            }
+
+password_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE)
+
+PASSWORD_POOL_PENDING.set_function(lambda: password_pool.metrics()["pending"])
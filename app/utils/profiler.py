@@ -0,0 +1,238 @@
+# Profiler SQL theo request (chỉ bật khi cần)
+# Ghi lại mọi câu SQL của một request kèm thời gian và vị trí gọi (file Python
+# hoặc dòng template), gom theo "hình dạng" câu lệnh để phát hiện N+1: cùng một
+# câu SELECT chạy lặp lại nhiều lần, thường do lazy load trong vòng lặp
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, NamedTuple, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Bật cho mọi request bằng SQL_PROFILE=1
+SQL_PROFILE_ENABLED = os.getenv("SQL_PROFILE", "0") == "1"
+# Cho phép bật theo từng request bằng header "X-SQL-Profile: 1" khi đặt
+# SQL_PROFILE_ALLOW_HEADER=1 (mặc định tắt: panel và header lộ câu SQL, đường dẫn mã nguồn)
+SQL_PROFILE_ALLOW_HEADER = os.getenv("SQL_PROFILE_ALLOW_HEADER", "0") == "1"
+# Cùng một hình dạng câu lệnh chạy từ chừng này lần trở lên thì bị nghi là N+1
+SQL_PROFILE_N_PLUS_ONE = int(os.getenv("SQL_PROFILE_N_PLUS_ONE", "3"))
+# Số câu lệnh tối đa lưu chi tiết mỗi request (vẫn đếm tất cả)
+SQL_PROFILE_MAX_STATEMENTS = int(os.getenv("SQL_PROFILE_MAX_STATEMENTS", "500"))
+
+PROFILE_HEADER = "x-sql-profile"
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    """
+    Chuẩn hóa câu SQL: bỏ giá trị literal, gộp danh sách IN (?, ?, ...) và khoảng trắng
+    """
+    shape = _STRING_RE.sub("?", statement)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("(?)", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+def _find_caller() -> Optional[str]:
+    """
+    Vị trí gần nhất trong code của app (hoặc template) đã phát ra câu SQL
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        # Template Jinja2 có thể mang đường dẫn tương đối
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(_APP_DIR) and filename != _THIS_FILE:
+            template = frame.f_globals.get("__jinja_template__")
+            lineno = template.get_corresponding_lineno(frame.f_lineno) if template else frame.f_lineno
+            return f"{os.path.relpath(filename, os.path.dirname(_APP_DIR))}:{lineno}"
+        frame = frame.f_back
+    return None
+
+class ProfiledStatement(NamedTuple):
+    statement: str
+    shape: str
+    seconds: float
+    caller: Optional[str]
+
+class QueryProfile:
+    """
+    Các câu SQL đã chạy trong một request (hoặc một khối `profile_queries()`)
+    """
+
+    def __init__(self, n_plus_one_threshold: int = SQL_PROFILE_N_PLUS_ONE,
+                 max_statements: int = SQL_PROFILE_MAX_STATEMENTS):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.max_statements = max_statements
+        self.statements: List[ProfiledStatement] = []
+        self.count = 0
+        self.total_seconds = 0.0
+        self._shapes: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float, caller: Optional[str]) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self._shapes[shape] += 1
+            if len(self.statements) < self.max_statements:
+                self.statements.append(ProfiledStatement(statement, shape, seconds, caller))
+
+    def n_plus_one_suspects(self) -> List[dict]:
+        """
+        Các hình dạng câu SELECT lặp lại từ ngưỡng trở lên, nhiều lần nhất trước
+        """
+        suspects = []
+        for shape, count in self._shapes.most_common():
+            if count < self.n_plus_one_threshold:
+                break
+            if not shape.upper().startswith("SELECT"):
+                continue
+            matching = [item for item in self.statements if item.shape == shape]
+            suspects.append({
+                "shape": shape,
+                "count": count,
+                "seconds": sum(item.seconds for item in matching),
+                "callers": sorted({item.caller for item in matching if item.caller})
+            })
+        return suspects
+
+    def summary(self) -> dict:
+        return {
+            "statements": self.count,
+            "total_ms": round(self.total_seconds * 1000, 2),
+            "n_plus_one": self.n_plus_one_suspects()
+        }
+
+    def header_value(self) -> str:
+        return (
+            f"statements={self.count}; time_ms={self.total_seconds * 1000:.2f}; "
+            f"n_plus_one={len(self.n_plus_one_suspects())}"
+        )
+
+    def assert_budget(self, max_statements: Optional[int] = None, allow_n_plus_one: bool = False) -> None:
+        """
+        Kiểm tra ngân sách câu SQL (dùng trong test), raise AssertionError nếu vượt
+        """
+        if max_statements is not None and self.count > max_statements:
+            raise AssertionError(
+                f"{self.count} câu SQL, vượt ngân sách {max_statements}:\n"
+                + "\n".join(f"  [{item.caller}] {item.shape}" for item in self.statements)
+            )
+        suspects = self.n_plus_one_suspects()
+        if suspects and not allow_n_plus_one:
+            raise AssertionError(
+                "Nghi vấn N+1:\n"
+                + "\n".join(f"  {s['count']}x {s['shape']} ({', '.join(s['callers'])})" for s in suspects)
+            )
+
+# Profile của request hiện tại (context được sao chép sang threadpool)
+current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("current_profile", default=None)
+# Profile của các khối profile_queries() đang mở: ghi mọi câu SQL của tiến trình,
+# kể cả khi request chạy ở thread / event loop khác (như TestClient)
+_captures: List[QueryProfile] = []
+_captures_lock = threading.Lock()
+
+def get_current_profile() -> Optional[QueryProfile]:
+    """
+    Profile của request hiện tại (None nếu không bật), dùng trong template
+    """
+    return current_profile.get()
+
+@contextmanager
+def profile_queries(n_plus_one_threshold: int = SQL_PROFILE_N_PLUS_ONE) -> Iterator[QueryProfile]:
+    """
+    Ghi lại mọi câu SQL chạy trong khối with, ví dụ trong test:
+
+        with profile_queries() as profile:
+            client.get("/tasks")
+        profile.assert_budget(max_statements=5)
+    """
+    profile = QueryProfile(n_plus_one_threshold)
+    with _captures_lock:
+        _captures.append(profile)
+    try:
+        yield profile
+    finally:
+        with _captures_lock:
+            _captures.remove(profile)
+
+def install_profiler(engine: Engine) -> None:
+    """
+    Gắn event listener ghi câu SQL vào profile đang bật (không tốn gì khi không bật)
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile.get()
+        if profile is None and not _captures:
+            return
+        if context is not None:
+            context._profiler_started = time.perf_counter()
+            context._profiler_caller = _find_caller()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_profiler_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        profiles = list(_captures)
+        profile = current_profile.get()
+        if profile is not None and profile not in profiles:
+            profiles.append(profile)
+        for item in profiles:
+            item.record(statement, elapsed, context._profiler_caller)
+
+class SQLProfilerMiddleware:
+    """
+    Middleware ASGI bật profiler cho request (SQL_PROFILE=1 hoặc header X-SQL-Profile: 1)
+    và trả tóm tắt qua header X-SQL-Profile / Server-Timing
+    Với response streaming, header chỉ tính các câu SQL chạy trước khi gửi header
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._enabled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-SQL-Profile"] = profile.header_value()
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={profile.total_seconds * 1000:.2f};desc="{profile.count} SQL"'
+                )
+            await send(message)
+
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+
+    @staticmethod
+    def _enabled(scope: Scope) -> bool:
+        if SQL_PROFILE_ENABLED:
+            return True
+        if not SQL_PROFILE_ALLOW_HEADER:
+            return False
+        return Headers(scope=scope).get(PROFILE_HEADER, "").lower() in ("1", "true", "on")
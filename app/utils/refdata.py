@@ -0,0 +1,90 @@
+# Cache dữ liệu tham chiếu (subject, label) theo user
+# Dùng cho dropdown và kiểm tra quyền sở hữu trong controller task,
+# được xóa bởi controller subject / label sau mỗi thao tác ghi
+import os
+from typing import List
+from sqlalchemy.orm import Session
+from app.models import Subject, Label
+from app.schemas import Subject as SubjectSchema, Label as LabelSchema
+from app.utils.cache import TTLCache
+
+# Số user tối đa giữ trong cache (loại bỏ theo LRU)
+REFDATA_CACHE_SIZE = int(os.getenv("REFDATA_CACHE_SIZE", "1024"))
+# Thời gian sống (giây) - giới hạn dữ liệu cũ khi chạy nhiều worker
+REFDATA_CACHE_TTL = float(os.getenv("REFDATA_CACHE_TTL", "300"))
+
+_refdata_cache = TTLCache(maxsize=REFDATA_CACHE_SIZE, ttl=REFDATA_CACHE_TTL)
+
+class UserRefData:
+    """
+    Danh sách subject / label của một user (bản sao tách khỏi session)
+    """
+    
+    def __init__(self, subjects: List[SubjectSchema], labels: List[LabelSchema]):
+        self.subjects = subjects
+        self.labels = labels
+        self.subject_ids = frozenset(subject.id for subject in subjects)
+        self.label_ids = frozenset(label.id for label in labels)
+
+def get_user_refdata(db: Session, user_id: int) -> UserRefData:
+    """
+    Lấy subject / label của user từ cache, nạp từ database nếu chưa có
+    """
+    refdata = _refdata_cache.get(user_id)
+    if refdata is None:
+        subjects = db.query(Subject).filter(Subject.user_id == user_id).order_by(Subject.id).all()
+        labels = db.query(Label).filter(Label.user_id == user_id).order_by(Label.id).all()
+        refdata = UserRefData(
+            [SubjectSchema.model_validate(subject) for subject in subjects],
+            [LabelSchema.model_validate(label) for label in labels]
+        )
+        _refdata_cache.set(user_id, refdata)
+    return refdata
+
+def get_user_subjects(db: Session, user_id: int) -> List[SubjectSchema]:
+    """
+    Danh sách subject của user
+    """
+    return get_user_refdata(db, user_id).subjects
+
+def get_user_labels(db: Session, user_id: int) -> List[LabelSchema]:
+    """
+    Danh sách label của user
+    """
+    return get_user_refdata(db, user_id).labels
+
+def _owned_in_database(db: Session, model, user_id: int, item_id: int) -> bool:
+    """
+    Kiểm tra quyền sở hữu trực tiếp trong database
+    Nếu có thì cache đã cũ (tạo ở worker khác hoặc trong lúc nạp cache): xóa để nạp lại
+    """
+    owned = db.query(
+        db.query(model.id).filter(model.id == item_id, model.user_id == user_id).exists()
+    ).scalar()
+    if owned:
+        invalidate_user_refdata(user_id)
+    return bool(owned)
+
+def user_owns_subject(db: Session, user_id: int, subject_id: int) -> bool:
+    """
+    Kiểm tra subject có thuộc về user không
+    Cache chỉ dùng để chấp nhận; không có trong cache thì hỏi lại database
+    """
+    if subject_id in get_user_refdata(db, user_id).subject_ids:
+        return True
+    return _owned_in_database(db, Subject, user_id, subject_id)
+
+def user_owns_label(db: Session, user_id: int, label_id: int) -> bool:
+    """
+    Kiểm tra label có thuộc về user không
+    Cache chỉ dùng để chấp nhận; không có trong cache thì hỏi lại database
+    """
+    if label_id in get_user_refdata(db, user_id).label_ids:
+        return True
+    return _owned_in_database(db, Label, user_id, label_id)
+
+def invalidate_user_refdata(user_id: int) -> None:
+    """
+    Xóa cache subject / label của user (gọi sau khi tạo / sửa / xóa)
+    """
+    _refdata_cache.pop(user_id)
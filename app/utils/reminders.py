@@ -0,0 +1,82 @@
+# Phân loại công việc nhắc việc (đến hạn hôm nay, quá hạn, sắp đến hạn)
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session, joinedload
+from app.models import Task
+
+# Số ngày quá hạn để coi là "quá hạn nghiêm trọng"
+LONG_OVERDUE_DAYS = int(os.getenv("REMINDER_LONG_OVERDUE_DAYS", "3"))
+# Số ngày tới (tính từ ngày mai) hiển thị trong mục "sắp đến hạn", 0 để tắt
+UPCOMING_DAYS = int(os.getenv("REMINDER_UPCOMING_DAYS", "7"))
+
+# Khoảng thời gian [start, end) của một nhóm, None nghĩa là không giới hạn
+BucketRange = Tuple[Optional[datetime], Optional[datetime]]
+
+def reminder_bucket_ranges(
+    now: datetime,
+    long_overdue_days: int = LONG_OVERDUE_DAYS,
+    upcoming_days: int = UPCOMING_DAYS
+) -> Dict[str, BucketRange]:
+    """
+    Tính khoảng thời gian hạn chót cho từng nhóm nhắc việc
+    Các nhóm có thể giao nhau (task đến hạn sáng nay vừa "hôm nay" vừa "quá hạn")
+    """
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    tomorrow = today + timedelta(days=1)
+    long_overdue_before = now - timedelta(days=long_overdue_days)
+    
+    ranges = {
+        "due_today": (today, tomorrow),
+        "recent_overdue": (long_overdue_before, now),
+        "long_overdue": (None, long_overdue_before),
+    }
+    if upcoming_days > 0:
+        ranges["upcoming"] = (tomorrow, tomorrow + timedelta(days=upcoming_days))
+    return ranges
+
+def _scan_upper_bound(ranges: Dict[str, BucketRange]) -> Optional[datetime]:
+    """
+    Mốc hạn chót lớn nhất cần đọc (None nếu có nhóm không giới hạn trên)
+    """
+    ends = [end for _, end in ranges.values()]
+    if any(end is None for end in ends):
+        return None
+    return max(ends)
+
+def bucket_tasks(tasks: List[Task], ranges: Dict[str, BucketRange]) -> Dict[str, List[Task]]:
+    """
+    Chia danh sách task (đã sắp xếp theo due_date) vào các nhóm
+    Thứ tự trong mỗi nhóm giữ nguyên thứ tự đầu vào
+    """
+    buckets = {name: [] for name in ranges}
+    for task in tasks:
+        for name, (start, end) in ranges.items():
+            if start is not None and task.due_date < start:
+                continue
+            if end is not None and task.due_date >= end:
+                continue
+            buckets[name].append(task)
+    return buckets
+
+def get_reminder_buckets(db: Session, user_id: int, now: datetime) -> Dict[str, List[Task]]:
+    """
+    Đọc các task chưa xong có hạn chót bằng một lần quét theo index
+    (user_id, status, due_date) rồi chia nhóm trong Python
+    """
+    ranges = reminder_bucket_ranges(now)
+    query = db.query(Task).options(
+        joinedload(Task.subject),
+        joinedload(Task.label)
+    ).filter(
+        Task.user_id == user_id,
+        Task.status == "todo",
+        Task.due_date.isnot(None)
+    )
+    
+    upper_bound = _scan_upper_bound(ranges)
+    if upper_bound is not None:
+        query = query.filter(Task.due_date < upper_bound)
+    
+    tasks = query.order_by(Task.due_date.asc()).all()
+    return bucket_tasks(tasks, ranges)
@@ -0,0 +1,284 @@
+# Bộ lập lịch nhắc việc theo hạn chót (chạy trong tiến trình)
+# Giữ một min-heap các mốc thời gian của task chưa xong trong một cửa sổ phía
+# trước: 0h ngày đến hạn (task chuyển sang "đến hạn hôm nay") và đúng hạn chót
+# (task chuyển sang "quá hạn"). Sự kiện được phát đúng lúc, qua broker SSE,
+# không cần quét định kỳ bảng tasks
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal
+from app.models import Task
+from app.utils.events import reminder_broker
+from app.utils.stats import invalidate_task_stats
+from app.utils.metrics import Counter, Gauge, registry
+
+# Tắt bằng SCHEDULER_ENABLED=0
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") != "0"
+# Độ dài cửa sổ thời gian được nạp vào heap mỗi lần (giờ)
+SCHEDULER_HORIZON_HOURS = float(os.getenv("SCHEDULER_HORIZON_HOURS", "24"))
+# Số task đọc mỗi lần khi nạp cửa sổ (nạp dần, không chặn event loop)
+SCHEDULER_LOAD_BATCH = int(os.getenv("SCHEDULER_LOAD_BATCH", "1000"))
+
+SCHEDULER_HEAP_ENTRIES = registry.register(Gauge(
+    "scheduler_heap_entries", "Số mốc nhắc việc đang chờ trong heap"
+))
+SCHEDULER_REMINDERS_FIRED = registry.register(Counter(
+    "scheduler_reminders_fired_total", "Số sự kiện nhắc việc đã phát"
+))
+
+DUE_TODAY = "due_today"
+OVERDUE = "overdue"
+
+def _start_of_day(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def reminder_times(due_date: datetime) -> List[Tuple[datetime, str]]:
+    """
+    Các mốc phát sự kiện của một task: 0h ngày đến hạn và đúng hạn chót
+    """
+    times = [(due_date, OVERDUE)]
+    start = _start_of_day(due_date)
+    if start < due_date:
+        times.insert(0, (start, DUE_TODAY))
+    return times
+
+class DueDateScheduler:
+    """
+    Heap các mốc nhắc việc trong cửa sổ [now, loaded_until)
+    Các handler (chạy trong threadpool) cập nhật heap qua schedule_task /
+    unschedule_tasks; vòng lặp trong event loop ngủ tới mốc gần nhất
+    """
+
+    def __init__(self, horizon: timedelta, batch_size: int):
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        # task_id -> (due_date, user_id): trạng thái mới nhất, mục heap lệch sẽ bị bỏ qua
+        self._tasks: Dict[int, Tuple[datetime, int]] = {}
+        self._lock = threading.Lock()
+        self._loaded_until: Optional[datetime] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._runner is not None and not self._runner.done()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def start(self) -> None:
+        """
+        Khởi động vòng lặp lập lịch (gọi trong lifespan của app)
+        """
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._runner = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Dừng vòng lặp và xóa heap
+        """
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+        self._runner = None
+        self._loop = None
+        with self._lock:
+            self._heap.clear()
+            self._tasks.clear()
+            self._loaded_until = None
+
+    # ===== Cập nhật từ các handler =====
+
+    def schedule_task(self, task: Task) -> None:
+        """
+        Cập nhật lịch của một task sau khi tạo / sửa / toggle
+        """
+        if task.status != "todo" or task.due_date is None:
+            self.unschedule_tasks([task.id])
+            return
+        self._push(task.id, task.user_id, task.due_date, datetime.now())
+
+    def unschedule_tasks(self, task_ids: Iterable[int], user_id: Optional[int] = None) -> None:
+        """
+        Bỏ lịch của các task đã xong / đã xóa (mục trong heap bị bỏ qua khi tới hạn)
+        Truyền user_id để chỉ bỏ các task thuộc user đó
+        """
+        if not self.running:
+            return
+        with self._lock:
+            for task_id in task_ids:
+                current = self._tasks.get(task_id)
+                if current is not None and (user_id is None or current[1] == user_id):
+                    del self._tasks[task_id]
+
+    def reload_user(self, db: Session, user_id: int) -> None:
+        """
+        Nạp lại lịch các task chưa xong của user trong cửa sổ hiện tại
+        (sau import hoặc thao tác hàng loạt)
+        """
+        if not self.running or self._loaded_until is None:
+            return
+        now = datetime.now()
+        rows = db.query(Task.id, Task.user_id, Task.due_date).filter(
+            Task.user_id == user_id,
+            Task.status == "todo",
+            Task.due_date >= now,
+            Task.due_date < self._loaded_until + timedelta(days=1)
+        ).all()
+        for task_id, task_user_id, due_date in rows:
+            self._push(task_id, task_user_id, due_date, now)
+
+    def _push(self, task_id: int, user_id: int, due_date: datetime, start: datetime) -> None:
+        """
+        Thêm các mốc của task nằm trong [start, loaded_until) vào heap
+        """
+        if not self.running or self._loaded_until is None:
+            return
+        wake = False
+        with self._lock:
+            self._tasks[task_id] = (due_date, user_id)
+            for fire_at, kind in reminder_times(due_date):
+                if fire_at < start or fire_at >= self._loaded_until:
+                    continue
+                heapq.heappush(self._heap, (fire_at, next(self._counter), kind, task_id, due_date))
+                wake = wake or self._heap[0][0] == fire_at
+        if wake:
+            # Mốc mới sớm hơn mốc vòng lặp đang chờ: đánh thức để tính lại
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ===== Vòng lặp trong event loop =====
+
+    async def _run(self) -> None:
+        now = datetime.now()
+        with self._lock:
+            self._loaded_until = now
+        while True:
+            now = datetime.now()
+            if now >= self._loaded_until:
+                await self._load_window(now)
+            fired = self._pop_due(now)
+            if fired:
+                await self._fire(fired)
+                continue
+
+            with self._lock:
+                next_at = self._heap[0][0] if self._heap else self._loaded_until
+            next_at = min(next_at, self._loaded_until)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), max((next_at - datetime.now()).total_seconds(), 0)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _load_window(self, now: datetime) -> None:
+        """
+        Nạp dần các task có mốc nhắc trong cửa sổ tiếp theo [start, end)
+        theo từng lô (keyset trên due_date, id)
+        """
+        start = self._loaded_until
+        end = max(start, now) + self.horizon
+        with self._lock:
+            self._loaded_until = end
+        # Mốc 0h của task nằm trong [start, end) khi hạn chót < end + 1 ngày
+        after = None
+        while True:
+            rows = await run_in_threadpool(self._load_batch, start, end + timedelta(days=1), after)
+            for task_id, user_id, due_date in rows:
+                self._push(task_id, user_id, due_date, start)
+            if len(rows) < self.batch_size:
+                break
+            after = (rows[-1][2], rows[-1][0])
+            # Nhường event loop giữa các lô
+            await asyncio.sleep(0)
+
+    def _load_batch(self, start: datetime, end: datetime, after: Optional[tuple]) -> list:
+        db = SessionLocal()
+        try:
+            query = db.query(Task.id, Task.user_id, Task.due_date).filter(
+                Task.status == "todo",
+                Task.due_date >= start,
+                Task.due_date < end
+            )
+            if after is not None:
+                after_due, after_id = after
+                query = query.filter(or_(
+                    Task.due_date > after_due,
+                    and_(Task.due_date == after_due, Task.id > after_id)
+                ))
+            return query.order_by(Task.due_date, Task.id).limit(self.batch_size).all()
+        finally:
+            db.close()
+
+    def _pop_due(self, now: datetime) -> List[tuple]:
+        """
+        Lấy các mốc đã tới, bỏ qua mục cũ (task đã xong / xóa / đổi hạn chót)
+        """
+        fired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, _, kind, task_id, due_date = heapq.heappop(self._heap)
+                current = self._tasks.get(task_id)
+                if current is None or current[0] != due_date:
+                    continue
+                fired.append((kind, task_id, due_date))
+                if kind == OVERDUE:
+                    del self._tasks[task_id]
+        return fired
+
+    async def _fire(self, fired: List[tuple]) -> None:
+        """
+        Kiểm tra lại với database rồi phát sự kiện nhắc việc tới user
+        """
+        rows = await run_in_threadpool(self._load_current, [task_id for _, task_id, _ in fired])
+        changed_users = set()
+        for kind, task_id, due_date in fired:
+            row = rows.get(task_id)
+            if row is None or row.status != "todo" or row.due_date != due_date:
+                continue
+            SCHEDULER_REMINDERS_FIRED.inc()
+            changed_users.add(row.user_id)
+            reminder_broker.publish_reminder(row.user_id, {
+                "kind": kind,
+                "task_id": task_id,
+                "title": row.title,
+                "due_date": due_date.isoformat()
+            })
+        # Bộ đếm đến hạn / quá hạn đổi theo thời gian: bỏ cache để tính lại
+        for user_id in changed_users:
+            invalidate_task_stats(user_id)
+            reminder_broker.notify_changed(user_id)
+
+    def _load_current(self, task_ids: List[int]) -> dict:
+        db = SessionLocal()
+        try:
+            rows = db.query(Task.id, Task.user_id, Task.title, Task.status, Task.due_date).filter(
+                Task.id.in_(task_ids)
+            ).all()
+            return {row.id: row for row in rows}
+        finally:
+            db.close()
+
+due_scheduler = DueDateScheduler(
+    horizon=timedelta(hours=SCHEDULER_HORIZON_HOURS),
+    batch_size=SCHEDULER_LOAD_BATCH
+)
+
+SCHEDULER_HEAP_ENTRIES.set_function(lambda: len(due_scheduler))
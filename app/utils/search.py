@@ -0,0 +1,83 @@
+# Tiện ích tìm kiếm toàn văn (SQLite FTS5) cho task
+# Bảng tasks_fts và các trigger đồng bộ được tạo trong app/migrations.py
+from typing import Dict, List, Optional
+from markupsafe import escape
+from sqlalchemy import bindparam, column, literal_column, select, table, text
+from sqlalchemy.orm import Session
+
+tasks_fts = table("tasks_fts", column("rowid"))
+
+# Ký tự đánh dấu đoạn khớp trong snippet, đổi thành <mark> sau khi escape HTML
+_HIGHLIGHT_START = "\x02"
+_HIGHLIGHT_END = "\x03"
+
+def build_match_query(search: str) -> Optional[str]:
+    """
+    Chuyển từ khóa người dùng nhập thành biểu thức MATCH của FTS5
+    Mỗi từ được đặt trong dấu nháy (tránh lỗi cú pháp) và cho phép khớp tiền tố
+    """
+    terms = []
+    for word in search.split():
+        word = word.replace('"', '""')
+        terms.append(f'"{word}"*')
+    if not terms:
+        return None
+    return " AND ".join(terms)
+
+def match_task_ids(match_query: str):
+    """
+    Subquery trả về id các task khớp biểu thức MATCH (dùng với Task.id.in_)
+    """
+    return select(tasks_fts.c.rowid).where(
+        literal_column("tasks_fts").op("MATCH")(match_query)
+    )
+
+def _highlight(raw: str) -> str:
+    """
+    Escape HTML rồi đổi ký tự đánh dấu thành thẻ <mark>
+    """
+    html = str(escape(raw))
+    return html.replace(_HIGHLIGHT_START, "<mark>").replace(_HIGHLIGHT_END, "</mark>")
+
+def search_tasks_ranked(db: Session, user_id: int, match_query: str, limit: int) -> List[tuple]:
+    """
+    Tìm task của user theo độ liên quan (bm25, title được ưu tiên hơn note)
+    Trả về danh sách (task_id, điểm, snippet HTML)
+    """
+    rows = db.execute(
+        text(
+            "SELECT tasks.id, bm25(tasks_fts, 10.0, 1.0) AS score, "
+            "snippet(tasks_fts, -1, :hl_start, :hl_end, '…', 12) "
+            "FROM tasks_fts JOIN tasks ON tasks.id = tasks_fts.rowid "
+            "WHERE tasks_fts MATCH :query AND tasks.user_id = :user_id "
+            "ORDER BY score LIMIT :limit"
+        ),
+        {
+            "hl_start": _HIGHLIGHT_START,
+            "hl_end": _HIGHLIGHT_END,
+            "query": match_query,
+            "user_id": user_id,
+            "limit": limit,
+        },
+    ).all()
+    return [(task_id, score, _highlight(snippet)) for task_id, score, snippet in rows]
+
+def task_snippets(db: Session, task_ids: List[int], match_query: str) -> Dict[int, str]:
+    """
+    Lấy snippet có đánh dấu từ khóa cho các task trong một trang kết quả
+    """
+    if not task_ids:
+        return {}
+    rows = db.execute(
+        text(
+            "SELECT rowid, snippet(tasks_fts, -1, :hl_start, :hl_end, '…', 12) "
+            "FROM tasks_fts WHERE tasks_fts MATCH :query AND rowid IN :ids"
+        ).bindparams(bindparam("ids", expanding=True)),
+        {
+            "hl_start": _HIGHLIGHT_START,
+            "hl_end": _HIGHLIGHT_END,
+            "query": match_query,
+            "ids": list(task_ids),
+        },
+    ).all()
+    return {task_id: _highlight(snippet) for task_id, snippet in rows}
@@ -0,0 +1,92 @@
+# Thống kê task cho dashboard
+import os
+from datetime import datetime, date, timedelta
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+from app.models import Task
+from app.utils.cache import TTLCache
+
+# Thời gian cache thống kê theo user (giây), đặt 0 để tắt cache
+DASHBOARD_STATS_TTL = float(os.getenv("DASHBOARD_STATS_TTL", "5"))
+
+_stats_cache = TTLCache(maxsize=10000, ttl=DASHBOARD_STATS_TTL)
+
+def _count_if(condition):
+    """
+    Đếm số dòng thỏa điều kiện trong một câu query tổng hợp
+    """
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+def compute_task_stats(db: Session, user_id: int) -> dict:
+    """
+    Tính thống kê task của user bằng một câu query tổng hợp duy nhất
+    """
+    today = date.today()
+    now = datetime.now()
+    is_todo = Task.status == "todo"
+    
+    row = db.query(
+        func.count(Task.id),
+        _count_if(is_todo),
+        _count_if(Task.status == "done"),
+        _count_if(and_(is_todo, Task.due_date >= today, Task.due_date < today + timedelta(days=1))),
+        _count_if(and_(is_todo, Task.due_date < now))
+    ).filter(Task.user_id == user_id).one()
+    
+    return {
+        "total_tasks": row[0],
+        "todo_tasks": row[1],
+        "done_tasks": row[2],
+        "due_today_count": row[3],
+        "overdue_count": row[4]
+    }
+
+def empty_task_counts() -> dict:
+    """
+    Bộ đếm rỗng cho subject / label chưa có task
+    """
+    return {"total": 0, "open": 0, "done": 0, "overdue": 0}
+
+def count_tasks_by(db: Session, user_id: int, group_column) -> dict:
+    """
+    Đếm task của user theo nhóm (Task.subject_id hoặc Task.label_id)
+    bằng một câu GROUP BY, không nạp dòng task nào vào bộ nhớ
+    Trả về dict: id nhóm -> {"total", "open", "done", "overdue"}
+    """
+    now = datetime.now()
+    is_todo = Task.status == "todo"
+    
+    rows = db.query(
+        group_column,
+        func.count(Task.id),
+        _count_if(is_todo),
+        _count_if(Task.status == "done"),
+        _count_if(and_(is_todo, Task.due_date < now))
+    ).filter(
+        Task.user_id == user_id,
+        group_column.isnot(None)
+    ).group_by(group_column).all()
+    
+    return {
+        group_id: {"total": total, "open": open_count, "done": done, "overdue": overdue}
+        for group_id, total, open_count, done, overdue in rows
+    }
+
+def get_task_stats(db: Session, user_id: int) -> dict:
+    """
+    Lấy thống kê task của user (dùng cache ngắn hạn nếu được bật)
+    """
+    if DASHBOARD_STATS_TTL <= 0:
+        return compute_task_stats(db, user_id)
+    
+    stats = _stats_cache.get(user_id)
+    if stats is None:
+        stats = compute_task_stats(db, user_id)
+        _stats_cache.set(user_id, stats)
+    return dict(stats)
+
+def invalidate_task_stats(user_id: int) -> None:
+    """
+    Xóa thống kê đã cache của user (gọi sau mỗi thao tác ghi task)
+    """
+    _stats_cache.pop(user_id)
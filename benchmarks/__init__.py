@@ -0,0 +1,6 @@
+# Các script đo hiệu năng (benchmark) cho ứng dụng
+
+# Database và mật khẩu mặc định dùng chung giữa benchmarks.seed và benchmarks.load_test
+# (khai báo ở đây để load_test không phải import app trước khi cấu hình DATABASE_URL)
+DEFAULT_DATABASE_URL = "sqlite:///./bench_todo.db"
+DEFAULT_PASSWORD = "bench-password"
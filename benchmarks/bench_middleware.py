@@ -0,0 +1,149 @@
+# Benchmark so sánh CookieAuthMiddleware (ASGI thuần) với bản cũ dùng BaseHTTPMiddleware
+#
+# Chạy từ thư mục gốc của project (cần httpx):
+#     python -m benchmarks.bench_middleware --tasks 200 --requests 500 --concurrency 10
+#
+# Script dùng một database SQLite tạm, không đụng tới todo_app.db
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Database tạm phải được cấu hình trước khi import app
+_tmp_dir = tempfile.mkdtemp(prefix="todo_bench_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp_dir}/bench.db")
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("Cần cài httpx để chạy benchmark: pip install httpx")
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import RedirectResponse
+
+import main
+from app.database import SessionLocal
+from app.middleware import CookieAuthMiddleware
+from app.models import User, Subject, Task
+from app.utils.auth import create_access_token, get_password_hash, get_principal_from_token
+
+ROUTES = ["/tasks", "/dashboard"]
+
+class LegacyCookieAuthMiddleware(BaseHTTPMiddleware):
+    """
+    Bản middleware cũ (BaseHTTPMiddleware + any(startswith) trên set) để so sánh
+    """
+
+    PUBLIC_PATHS = {
+        "/login", "/register", "/logout", "/token", "/static", "/docs", "/redoc", "/openapi.json"
+    }
+
+    async def dispatch(self, request, call_next):
+        path = request.url.path
+        if path == "/" or any(path.startswith(public_path) for public_path in self.PUBLIC_PATHS):
+            return await call_next(request)
+
+        token = request.cookies.get("access_token")
+        if token:
+            if token.startswith("Bearer "):
+                token = token[7:]
+            user = get_principal_from_token(token)
+            if user:
+                request.state.user = user
+                return await call_next(request)
+
+        return RedirectResponse(url="/login", status_code=303)
+
+def seed(task_count: int) -> str:
+    """
+    Tạo một user với task_count task, trả về access token của user
+    """
+    db = SessionLocal()
+    try:
+        user = User(
+            username="bench",
+            email="bench@example.com",
+            hashed_password=get_password_hash("bench-password")
+        )
+        db.add(user)
+        db.flush()
+        subject = Subject(name="Benchmark", user_id=user.id)
+        db.add(subject)
+        db.flush()
+        db.add_all([
+            Task(title=f"Task {i}", user_id=user.id, subject_id=subject.id, status="todo")
+            for i in range(task_count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+    return create_access_token({"sub": "bench"})
+
+def use_middleware(middleware_class) -> None:
+    """
+    Thay lớp auth middleware của app và buộc Starlette dựng lại middleware stack
+    """
+    for middleware in main.app.user_middleware:
+        if middleware.cls in (CookieAuthMiddleware, LegacyCookieAuthMiddleware):
+            middleware.cls = middleware_class
+    main.app.middleware_stack = None
+
+async def measure(path: str, token: str, total_requests: int, concurrency: int) -> dict:
+    """
+    Gửi total_requests request tới path với concurrency kết nối song song
+    """
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+        cookies={"access_token": f"Bearer {token}"}
+    ) as client:
+        # Warm-up (nạp cache, biên dịch template)
+        for _ in range(5):
+            response = await client.get(path)
+            response.raise_for_status()
+
+        remaining = total_requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get(path)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {"requests": total_requests, "seconds": round(elapsed, 3), "rps": round(total_requests / elapsed, 1)}
+
+async def run(args) -> dict:
+    token = seed(args.tasks)
+    results = {}
+    for name, middleware_class in (("base_http", LegacyCookieAuthMiddleware), ("pure_asgi", CookieAuthMiddleware)):
+        use_middleware(middleware_class)
+        results[name] = {
+            path: await measure(path, token, args.requests, args.concurrency) for path in ROUTES
+        }
+    results["speedup"] = {
+        path: round(results["pure_asgi"][path]["rps"] / results["base_http"][path]["rps"], 3)
+        for path in ROUTES
+    }
+    return results
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark auth middleware (requests/giây)")
+    parser.add_argument("--tasks", type=int, default=200, help="Số task của user benchmark")
+    parser.add_argument("--requests", type=int, default=500, help="Số request cho mỗi route")
+    parser.add_argument("--concurrency", type=int, default=10, help="Số request song song")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main_cli()
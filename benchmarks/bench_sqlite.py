@@ -0,0 +1,124 @@
+# Benchmark thông lượng đọc / ghi song song của các profile SQLite
+#
+# Chạy từ thư mục gốc của project:
+#     python -m benchmarks.bench_sqlite --readers 8 --writers 2 --seconds 5
+#
+# Mỗi profile chạy trên một file database tạm riêng, không đụng tới todo_app.db
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database import Base, DATABASE_PROFILES, create_db_engine
+from app.migrations import run_migrations
+import app.models  # noqa: F401  (đăng ký các bảng vào Base.metadata)
+
+READ_SQL = text(
+    "SELECT id, title, status, due_date FROM tasks WHERE user_id = :user_id "
+    "ORDER BY created_at DESC, id DESC LIMIT 20"
+)
+TOGGLE_SQL = text(
+    "UPDATE tasks SET status = CASE status WHEN 'todo' THEN 'done' ELSE 'todo' END "
+    "WHERE id = :task_id AND user_id = :user_id"
+)
+INSERT_SQL = text(
+    "INSERT INTO tasks (title, status, user_id, subject_id, created_at) "
+    "VALUES (:title, 'todo', :user_id, 1, CURRENT_TIMESTAMP)"
+)
+
+def prepare(db_engine, users: int, tasks_per_user: int) -> None:
+    """
+    Tạo schema và dữ liệu mẫu
+    """
+    Base.metadata.create_all(bind=db_engine)
+    run_migrations(db_engine)
+    with db_engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO users (id, username, email, hashed_password) VALUES (:id, :u, :e, 'x')"),
+            [{"id": i, "u": f"user{i}", "e": f"user{i}@example.com"} for i in range(1, users + 1)]
+        )
+        conn.execute(
+            text("INSERT INTO subjects (id, name, user_id) VALUES (1, 'Benchmark', 1)")
+        )
+        conn.execute(
+            INSERT_SQL,
+            [
+                {"title": f"Task {i}", "user_id": user_id}
+                for user_id in range(1, users + 1)
+                for i in range(tasks_per_user)
+            ]
+        )
+
+def run_profile(profile: str, args) -> dict:
+    """
+    Chạy các thread đọc / ghi song song trong args.seconds giây
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="todo_sqlite_bench_"), "bench.db")
+    db_engine = create_db_engine(f"sqlite:///{path}", profile)
+    prepare(db_engine, args.users, args.tasks)
+    max_task_id = args.users * args.tasks
+
+    counters = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def reader():
+        done = 0
+        while time.perf_counter() < deadline:
+            with db_engine.connect() as conn:
+                conn.execute(READ_SQL, {"user_id": random.randint(1, args.users)}).fetchall()
+            done += 1
+        with lock:
+            counters["reads"] += done
+
+    def writer():
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            user_id = random.randint(1, args.users)
+            try:
+                with db_engine.begin() as conn:
+                    conn.execute(TOGGLE_SQL, {"task_id": random.randint(1, max_task_id), "user_id": user_id})
+                    conn.execute(INSERT_SQL, {"title": "Bench insert", "user_id": user_id})
+                done += 1
+            except OperationalError:
+                # "database is locked" khi không có busy_timeout
+                errors += 1
+        with lock:
+            counters["writes"] += done
+            counters["errors"] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    db_engine.dispose()
+
+    return {
+        "reads_per_second": round(counters["reads"] / args.seconds, 1),
+        "writes_per_second": round(counters["writes"] / args.seconds, 1),
+        "write_errors": counters["errors"],
+    }
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark các profile SQLite")
+    parser.add_argument("--profiles", nargs="+", default=list(DATABASE_PROFILES), help="Các profile cần đo")
+    parser.add_argument("--users", type=int, default=50, help="Số user mẫu")
+    parser.add_argument("--tasks", type=int, default=200, help="Số task mỗi user")
+    parser.add_argument("--readers", type=int, default=8, help="Số thread đọc")
+    parser.add_argument("--writers", type=int, default=2, help="Số thread ghi")
+    parser.add_argument("--seconds", type=float, default=5, help="Thời gian chạy mỗi profile")
+    args = parser.parse_args()
+
+    results = {profile: run_profile(profile, args) for profile in args.profiles}
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,268 @@
+# Load test HTTP bất đồng bộ: nhiều user ảo đăng nhập rồi gửi request theo một tỉ lệ
+# giống người dùng thật, báo cáo thông lượng và độ trễ p50 / p95 / p99 theo route (JSON)
+#
+# Chạy từ thư mục gốc của project (cần httpx), trên dữ liệu tạo bởi benchmarks.seed:
+#     python -m benchmarks.seed --users 100 --tasks 300 --reset
+#     DATABASE_URL=sqlite:///./bench_todo.db DATABASE_PROFILE=production uvicorn main:app --workers 1
+#     python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --concurrency 20 --duration 30
+#
+# Hoặc chạy app ngay trong tiến trình (không qua mạng) với --in-process.
+# Lưu kết quả bằng --output để so sánh giữa các commit
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("Cần cài httpx để chạy load test: pip install httpx")
+
+from benchmarks import DEFAULT_DATABASE_URL, DEFAULT_PASSWORD
+
+# (tên route trong báo cáo, trọng số): tỉ lệ các thao tác của một user ảo
+SCENARIO_WEIGHTS = [
+    ("GET /dashboard", 20),
+    ("GET /tasks", 15),
+    ("GET /tasks?status=todo", 6),
+    ("GET /tasks?status=done", 4),
+    ("GET /tasks?overdue", 6),
+    ("GET /tasks?due_today", 6),
+    ("GET /tasks?subject_id", 5),
+    ("GET /tasks?label_id", 5),
+    ("GET /tasks?search", 5),
+    ("GET /notifications", 12),
+    ("POST /tasks/{id}/toggle", 10),
+    ("POST /tasks/create", 6),
+]
+SEARCH_TERMS = ["báo cáo", "email", "kế hoạch", "hợp đồng", "review", "lịch họp"]
+
+def percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    """
+    Percentile theo nearest-rank trên danh sách đã sắp xếp
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class RouteStats:
+    """
+    Độ trễ (giây) và số lỗi của một route
+    """
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.statuses: Dict[int, int] = {}
+
+    def add(self, seconds: float, status: int, ok: bool) -> None:
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+    def report(self, duration: float) -> dict:
+        values = sorted(self.latencies)
+        to_ms = lambda value: round(value * 1000, 2) if value is not None else None
+        return {
+            "requests": len(values),
+            "errors": self.errors,
+            "rps": round(len(values) / duration, 1) if duration else None,
+            "mean_ms": to_ms(sum(values) / len(values)) if values else None,
+            "p50_ms": to_ms(percentile(values, 50)),
+            "p95_ms": to_ms(percentile(values, 95)),
+            "p99_ms": to_ms(percentile(values, 99)),
+            "max_ms": to_ms(values[-1]) if values else None,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+        }
+
+class VirtualUser:
+    """
+    Một user ảo: client riêng (cookie riêng), id task / subject / label của chính user đó
+    """
+
+    def __init__(self, client: httpx.AsyncClient, username: str, rng: random.Random):
+        self.client = client
+        self.username = username
+        self.rng = rng
+        self.task_ids: List[int] = []
+        self.subject_ids: List[int] = []
+        self.label_ids: List[int] = []
+
+    async def login(self, password: str) -> None:
+        # Cookie access_token được client tự lưu cho các request sau
+        response = await self.client.post("/login", data={"username": self.username, "password": password})
+        if response.status_code != 303 or "access_token" not in self.client.cookies:
+            raise RuntimeError(f"Đăng nhập thất bại cho {self.username}: HTTP {response.status_code}")
+
+        page = (await self.client.get("/api/tasks", params={"limit": 100})).json()
+        self.task_ids = [item["id"] for item in page["items"]]
+        self.subject_ids = [item["id"] for item in (await self.client.get("/api/subjects")).json()]
+        self.label_ids = [item["id"] for item in (await self.client.get("/api/labels")).json()]
+
+    def build_request(self, scenario: str):
+        """
+        (method, url, kwargs) cho một thao tác
+        """
+        rng = self.rng
+        if scenario == "GET /dashboard":
+            return "GET", "/dashboard", {}
+        if scenario == "GET /notifications":
+            return "GET", "/notifications", {}
+        if scenario == "GET /tasks":
+            return "GET", "/tasks", {}
+        if scenario == "GET /tasks?status=todo":
+            return "GET", "/tasks", {"params": {"status": "todo"}}
+        if scenario == "GET /tasks?status=done":
+            return "GET", "/tasks", {"params": {"status": "done"}}
+        if scenario == "GET /tasks?overdue":
+            return "GET", "/tasks", {"params": {"overdue": "true"}}
+        if scenario == "GET /tasks?due_today":
+            return "GET", "/tasks", {"params": {"due_today": "true"}}
+        if scenario == "GET /tasks?subject_id" and self.subject_ids:
+            return "GET", "/tasks", {"params": {"subject_id": rng.choice(self.subject_ids)}}
+        if scenario == "GET /tasks?label_id" and self.label_ids:
+            return "GET", "/tasks", {"params": {"label_id": rng.choice(self.label_ids)}}
+        if scenario == "GET /tasks?search":
+            return "GET", "/tasks", {"params": {"search": rng.choice(SEARCH_TERMS)}}
+        if scenario == "POST /tasks/{id}/toggle" and self.task_ids:
+            task_id = rng.choice(self.task_ids)
+            return "POST", f"/tasks/{task_id}/toggle", {"headers": {"Accept": "application/json"}}
+        if scenario == "POST /tasks/create" and self.subject_ids:
+            due_date = datetime.now() + timedelta(days=rng.uniform(-2, 12))
+            return "POST", "/tasks/create", {"data": {
+                "title": f"Load test {rng.randint(1, 10**6)}",
+                "note": "Tạo bởi benchmarks.load_test",
+                "subject_id": rng.choice(self.subject_ids),
+                "label_id": str(rng.choice(self.label_ids)) if self.label_ids and rng.random() < 0.7 else "",
+                "due_date": due_date.strftime("%Y-%m-%dT%H:%M"),
+            }}
+        return None
+
+async def run_user(user: VirtualUser, scenarios: List[str], weights: List[int],
+                   stats: Dict[str, RouteStats], measure_from: float, deadline: float) -> None:
+    """
+    Gửi request liên tục tới hết thời gian; bỏ qua số liệu trong giai đoạn warm-up
+    """
+    while time.perf_counter() < deadline:
+        scenario = user.rng.choices(scenarios, weights)[0]
+        request = user.build_request(scenario)
+        if request is None:
+            continue
+        method, url, kwargs = request
+        started = time.perf_counter()
+        try:
+            response = await user.client.request(method, url, **kwargs)
+            status = response.status_code
+            # Tạo task xong được redirect (303) về danh sách
+            ok = status < 400
+        except httpx.HTTPError:
+            status, ok = 0, False
+        elapsed = time.perf_counter() - started
+        if started >= measure_from:
+            stats.setdefault(scenario, RouteStats()).add(elapsed, status, ok)
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _make_transport(args):
+    """
+    Transport tới server thật (mặc định) hoặc tới app trong tiến trình (--in-process)
+    """
+    if not args.in_process:
+        return None
+    # Database phải được cấu hình trước khi import app
+    os.environ["DATABASE_URL"] = args.database_url
+    import main
+    return httpx.ASGITransport(app=main.app)
+
+async def run(args) -> dict:
+    transport = _make_transport(args)
+    base_url = "http://bench" if transport else args.base_url
+    scenarios = [name for name, _ in SCENARIO_WEIGHTS]
+    weights = [weight for _, weight in SCENARIO_WEIGHTS]
+    limits = httpx.Limits(max_connections=2, max_keepalive_connections=2)
+
+    users: List[VirtualUser] = []
+    for index in range(args.concurrency):
+        client = httpx.AsyncClient(
+            base_url=base_url, transport=transport, limits=limits, timeout=args.timeout
+        )
+        username = f"{args.user_prefix}{args.first_user + index % args.users}"
+        users.append(VirtualUser(client, username, random.Random(args.seed * 1000 + index)))
+
+    stats: Dict[str, RouteStats] = {}
+    try:
+        # Đăng nhập tuần tự: bcrypt chạy trong pool có giới hạn của server
+        for user in users:
+            await user.login(args.password)
+
+        started = time.perf_counter()
+        measure_from = started + args.warmup
+        deadline = measure_from + args.duration
+        await asyncio.gather(*(
+            run_user(user, scenarios, weights, stats, measure_from, deadline) for user in users
+        ))
+    finally:
+        for user in users:
+            await user.client.aclose()
+
+    routes = {name: stats[name].report(args.duration) for name in scenarios if name in stats}
+    total = RouteStats()
+    for route_stats in stats.values():
+        total.latencies.extend(route_stats.latencies)
+        total.errors += route_stats.errors
+        for status, count in route_stats.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + count
+
+    return {
+        "commit": _git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": "in-process" if transport else args.base_url,
+        "concurrency": args.concurrency,
+        "duration_seconds": args.duration,
+        "warmup_seconds": args.warmup,
+        "seed": args.seed,
+        "total": total.report(args.duration),
+        "routes": routes,
+    }
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Load test HTTP (thông lượng và độ trễ theo route)")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Địa chỉ server cần đo")
+    parser.add_argument("--in-process", action="store_true", help="Chạy app trong tiến trình thay vì qua mạng")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL, help="Database cho --in-process")
+    parser.add_argument("--concurrency", type=int, default=20, help="Số user ảo chạy song song")
+    parser.add_argument("--duration", type=float, default=30, help="Thời gian đo (giây)")
+    parser.add_argument("--warmup", type=float, default=5, help="Thời gian warm-up không tính (giây)")
+    parser.add_argument("--users", type=int, default=100, help="Số user đã seed để phân cho user ảo")
+    parser.add_argument("--first-user", type=int, default=1, help="Số thứ tự của user seed đầu tiên")
+    parser.add_argument("--user-prefix", default="bench", help="Tiền tố username đã seed")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Mật khẩu của các user seed")
+    parser.add_argument("--timeout", type=float, default=30, help="Timeout mỗi request (giây)")
+    parser.add_argument("--seed", type=int, default=42, help="Seed chọn thao tác")
+    parser.add_argument("--output", help="Ghi kết quả JSON ra file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+if __name__ == "__main__":
+    main_cli()
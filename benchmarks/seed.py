@@ -0,0 +1,209 @@
+# Sinh dữ liệu mẫu lớn cho benchmark / load test (insert theo lô, không qua form HTTP)
+#
+# Chạy từ thư mục gốc của project:
+#     python -m benchmarks.seed --users 100 --subjects 6 --labels 5 --tasks 300 --reset
+#
+# Mặc định ghi vào ./bench_todo.db (không đụng tới todo_app.db). User được tạo
+# là bench1..benchN, dùng chung mật khẩu --password. Cùng --seed cho cùng dữ liệu
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+from sqlalchemy import insert, text
+from sqlalchemy.engine import make_url
+
+from app.database import Base, DATABASE_PROFILES, create_db_engine
+from app.migrations import run_migrations
+from app.models import User, Subject, Label, Task
+from app.utils.auth import get_password_hash
+from benchmarks import DEFAULT_DATABASE_URL, DEFAULT_PASSWORD
+
+SUBJECT_NAMES = [
+    "Công việc", "Học tập", "Gia đình", "Sức khỏe", "Tài chính", "Dự án cá nhân",
+    "Mua sắm", "Du lịch", "Đọc sách", "Nhà cửa", "Sở thích", "Khác"
+]
+LABEL_STYLES = [
+    ("Khẩn cấp", "#DC3545"), ("Quan trọng", "#FD7E14"), ("Bình thường", "#0D6EFD"),
+    ("Thấp", "#6C757D"), ("Chờ phản hồi", "#6F42C1"), ("Ý tưởng", "#20C997"),
+    ("Định kỳ", "#198754"), ("Cá nhân", "#D63384")
+]
+TITLE_VERBS = ["Hoàn thành", "Chuẩn bị", "Kiểm tra", "Viết", "Gửi", "Đọc", "Sửa", "Lên kế hoạch", "Gọi", "Ôn tập"]
+TITLE_OBJECTS = [
+    "báo cáo tuần", "slide thuyết trình", "email khách hàng", "bài tập chương 3", "hóa đơn điện",
+    "tài liệu dự án", "lịch họp", "đơn hàng", "ghi chú cuộc họp", "kế hoạch quý", "bài kiểm tra",
+    "hợp đồng", "ngân sách tháng", "danh sách mua sắm", "review code"
+]
+NOTE_WORDS = [
+    "cần", "xem", "lại", "trước", "khi", "gửi", "cho", "nhóm", "deadline", "sớm", "ưu", "tiên",
+    "bổ", "sung", "số", "liệu", "tham", "khảo", "tài", "liệu", "hỏi", "ý", "kiến"
+]
+
+def _zipf_weights(count: int) -> List[float]:
+    """
+    Trọng số lệch kiểu Zipf: vài subject / label được dùng nhiều, phần còn lại ít
+    """
+    return [1.0 / rank for rank in range(1, count + 1)]
+
+def _random_due_date(rng: random.Random, now: datetime, status: str):
+    """
+    Hạn chót: 20% không có, số còn lại trải từ quá hạn tới vài tháng tới.
+    Task đã xong phần lớn có hạn trong quá khứ
+    """
+    roll = rng.random()
+    if roll < 0.2:
+        return None
+    if status == "done":
+        return now - timedelta(days=rng.uniform(0, 60))
+    if roll < 0.35:
+        # Quá hạn
+        return now - timedelta(days=rng.uniform(0.01, 30))
+    if roll < 0.45:
+        # Đến hạn hôm nay (trước nửa đêm)
+        end_of_day = now.replace(hour=23, minute=59, second=0, microsecond=0)
+        return now + (end_of_day - now) * rng.random()
+    if roll < 0.75:
+        return now + timedelta(days=rng.uniform(1, 7))
+    return now + timedelta(days=rng.uniform(7, 90))
+
+def iter_task_rows(rng: random.Random, now: datetime, user_id: int, subject_ids: List[int],
+                   label_ids: List[int], task_count: int) -> Iterator[dict]:
+    """
+    Sinh các dòng task của một user
+    """
+    subject_weights = _zipf_weights(len(subject_ids))
+    label_weights = _zipf_weights(len(label_ids))
+    for _ in range(task_count):
+        status = "done" if rng.random() < 0.4 else "todo"
+        due_date = _random_due_date(rng, now, status)
+        created_at = now - timedelta(days=rng.uniform(0, 180))
+        if due_date is not None and created_at > due_date:
+            created_at = due_date - timedelta(days=rng.uniform(0, 14))
+        note = None
+        if rng.random() < 0.5:
+            note = " ".join(rng.choices(NOTE_WORDS, k=rng.randint(4, 20)))
+        yield {
+            "title": f"{rng.choice(TITLE_VERBS)} {rng.choice(TITLE_OBJECTS)}",
+            "note": note,
+            "status": status,
+            "due_date": due_date,
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(days=rng.uniform(0, 3)) if status == "done" else None,
+            "user_id": user_id,
+            "subject_id": rng.choices(subject_ids, subject_weights)[0],
+            "label_id": rng.choices(label_ids, label_weights)[0] if label_ids and rng.random() < 0.7 else None,
+        }
+
+def seed_database(database_url: str, profile: str, users: int, subjects: int, labels: int,
+                  tasks: int, password: str, seed: int, batch_size: int) -> dict:
+    """
+    Tạo schema và insert dữ liệu theo lô trong một transaction, trả về thống kê
+    """
+    db_engine = create_db_engine(database_url, profile)
+    Base.metadata.create_all(bind=db_engine)
+    run_migrations(db_engine)
+
+    rng = random.Random(seed)
+    now = datetime.now()
+    # Hash một lần cho mọi user: bcrypt là phần chậm nhất nếu hash từng user
+    hashed_password = get_password_hash(password)
+    subjects = min(subjects, len(SUBJECT_NAMES))
+    labels = min(labels, len(LABEL_STYLES))
+
+    started = time.perf_counter()
+    counts = {"users": 0, "subjects": 0, "labels": 0, "tasks": 0}
+    with db_engine.begin() as conn:
+        # Dữ liệu benchmark tạo lại được: bỏ fsync để seed nhanh hơn
+        conn.execute(text("PRAGMA synchronous=OFF"))
+        first_user_id = (conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM users")).scalar() or 0) + 1
+        first_subject_id = (conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM subjects")).scalar() or 0) + 1
+        first_label_id = (conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM labels")).scalar() or 0) + 1
+
+        user_rows, subject_rows, label_rows = [], [], []
+        for index in range(users):
+            user_id = first_user_id + index
+            user_rows.append({
+                "id": user_id,
+                "username": f"bench{user_id}",
+                "email": f"bench{user_id}@example.com",
+                "hashed_password": hashed_password,
+                "full_name": f"Bench User {user_id}",
+                "created_at": now - timedelta(days=rng.uniform(0, 365)),
+            })
+            for offset, name in enumerate(SUBJECT_NAMES[:subjects]):
+                subject_rows.append({
+                    "id": first_subject_id + index * subjects + offset,
+                    "name": name, "user_id": user_id, "created_at": now,
+                })
+            for offset, (name, color) in enumerate(LABEL_STYLES[:labels]):
+                label_rows.append({
+                    "id": first_label_id + index * labels + offset,
+                    "name": name, "color": color, "user_id": user_id, "created_at": now,
+                })
+        for table, rows in ((User.__table__, user_rows), (Subject.__table__, subject_rows),
+                            (Label.__table__, label_rows)):
+            if rows:
+                conn.execute(insert(table), rows)
+        counts.update(users=len(user_rows), subjects=len(subject_rows), labels=len(label_rows))
+
+        batch = []
+        for index in range(users):
+            user_id = first_user_id + index
+            subject_ids = [first_subject_id + index * subjects + offset for offset in range(subjects)]
+            label_ids = [first_label_id + index * labels + offset for offset in range(labels)]
+            for row in iter_task_rows(rng, now, user_id, subject_ids, label_ids, tasks):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    conn.execute(insert(Task.__table__), batch)
+                    counts["tasks"] += len(batch)
+                    batch = []
+        if batch:
+            conn.execute(insert(Task.__table__), batch)
+            counts["tasks"] += len(batch)
+
+    elapsed = time.perf_counter() - started
+    # Cập nhật thống kê cho query planner sau khi dữ liệu thay đổi nhiều
+    with db_engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    db_engine.dispose()
+    return {
+        "database_url": database_url,
+        "seed": seed,
+        **counts,
+        "seconds": round(elapsed, 3),
+        "tasks_per_second": round(counts["tasks"] / elapsed, 1) if elapsed else None,
+        "usernames": f"bench{first_user_id}..bench{first_user_id + users - 1}" if users else None,
+        "password": password,
+    }
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Sinh dữ liệu mẫu cho benchmark")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL, help="Database đích")
+    parser.add_argument("--profile", default="default", choices=list(DATABASE_PROFILES), help="Profile SQLite")
+    parser.add_argument("--users", type=int, default=100, help="Số user")
+    parser.add_argument("--subjects", type=int, default=6, help=f"Số subject mỗi user (tối đa {len(SUBJECT_NAMES)})")
+    parser.add_argument("--labels", type=int, default=5, help=f"Số label mỗi user (tối đa {len(LABEL_STYLES)})")
+    parser.add_argument("--tasks", type=int, default=300, help="Số task mỗi user")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Mật khẩu chung của các user")
+    parser.add_argument("--seed", type=int, default=42, help="Seed của bộ sinh ngẫu nhiên")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Số dòng mỗi lần insert")
+    parser.add_argument("--reset", action="store_true", help="Xóa file database SQLite trước khi seed")
+    args = parser.parse_args()
+
+    if args.reset:
+        path = make_url(args.database_url).database
+        for suffix in ("", "-wal", "-shm"):
+            if path and os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    result = seed_database(
+        args.database_url, args.profile, args.users, args.subjects, args.labels,
+        args.tasks, args.password, args.seed, args.batch_size
+    )
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main_cli()
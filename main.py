@@ -1,28 +1,65 @@
 # File chính khởi chạy ứng dụng FastAPI
 from fastapi import FastAPI, Request, Depends, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+from anyio import to_thread
+import hmac
 import uvicorn
 
 # Import database và models
-from app.database import SessionLocal, engine
+from app.database import SessionLocal, engine, pool_capacity, DATABASE_PROFILES, DATABASE_PROFILE
 from app.models import Base
 from app.utils.auth import get_current_active_user
-from app.middleware import CookieAuthMiddleware
+from app.utils.password_pool import password_pool
+from app.middleware import CookieAuthMiddleware, CompressionMiddleware
+from app.migrations import run_migrations
+from app.assets import AssetStaticFiles, STATIC_DIR
+from app.templating import templates, precompile_templates
+from app.utils.scheduler import due_scheduler, SCHEDULER_ENABLED
+from app.utils.metrics import (
+    MetricsMiddleware, instrument_engine, registry, METRICS_ENABLED, METRICS_TOKEN, METRICS_PUBLIC
+)
+from app.utils.profiler import SQLProfilerMiddleware, install_profiler
 
 # Import các controllers
 from app.controllers import auth, subjects, tasks, labels, notifications
 
-# Tạo bảng trong database
+# Tạo bảng trong database và áp dụng các migration còn thiếu
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Khởi động / dừng các tác vụ nền của ứng dụng
+    """
+    # Mỗi thread của threadpool (handler sync) giữ tối đa một kết nối database: với
+    # profile bật limit_threadpool, số thread không vượt dung lượng pool để request
+    # chờ thread thay vì giữ thread rồi chờ kết nối tới pool_timeout.
+    # Giới hạn này chỉ đúng khi mọi thread trả kết nối sớm: việc chặn thread khác
+    # cũng ăn vào số thread này (generator export stream từng phần, đọc file import).
+    # Chờ bcrypt không chiếm thread (handler auth là async, xem password_pool), nên
+    # một đợt đăng nhập không làm cạn threadpool đã bị giới hạn
+    limiter = to_thread.current_default_thread_limiter()
+    if DATABASE_PROFILES[DATABASE_PROFILE]["limit_threadpool"]:
+        capacity = pool_capacity(engine)
+        if capacity is not None and capacity < limiter.total_tokens:
+            limiter.total_tokens = capacity
+    # Pool bcrypt nhận tối đa nửa threadpool (sau khi đã giới hạn ở trên)
+    password_pool.limit_to_threadpool(int(limiter.total_tokens))
+    # Bộ lập lịch nhắc việc: nạp dần các hạn chót sắp tới và phát sự kiện đúng hạn
+    if SCHEDULER_ENABLED:
+        due_scheduler.start()
+    yield
+    await due_scheduler.stop()
 
 # Khởi tạo FastAPI app
 app = FastAPI(
     title="Todo List App",
     description="Ứng dụng quản lý công việc đơn giản",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Cấu hình CORS
@@ -37,11 +74,24 @@ app.add_middleware(
 # Thêm Cookie Auth Middleware
 app.add_middleware(CookieAuthMiddleware)
 
-# Mount static files (CSS, JS, images)
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Profiler SQL theo request (SQL_PROFILE=1 hoặc header X-SQL-Profile: 1)
+install_profiler(engine)
+app.add_middleware(SQLProfilerMiddleware)
+
+# Nén gzip / brotli cho response lớn (bọc ngoài các middleware ở trên)
+app.add_middleware(CompressionMiddleware)
 
-# Cấu hình Jinja2 templates
-templates = Jinja2Templates(directory="app/templates")
+# Đo số request, độ trễ và số câu SQL (thêm sau cùng để đo toàn bộ request)
+if METRICS_ENABLED:
+    instrument_engine(engine)
+    app.add_middleware(MetricsMiddleware)
+
+# Mount static files (CSS, JS, images): URL có hash được cache vĩnh viễn,
+# phục vụ file .br / .gz nén sẵn (tạo bằng `python -m app.assets`)
+app.mount("/static", AssetStaticFiles(directory=STATIC_DIR), name="static")
+
+# Biên dịch trước toàn bộ template (environment Jinja2 dùng chung trong app.templating)
+precompile_templates()
 
 # Include các router từ controllers
 app.include_router(auth.router, tags=["Authentication"])
@@ -57,6 +107,20 @@ async def root():
     """
     return RedirectResponse(url="/login")
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """
+    Số liệu vận hành theo định dạng text của Prometheus
+    """
+    # Mặc định không công khai: cần METRICS_TOKEN, hoặc bật rõ ràng METRICS_PUBLIC=1
+    if not METRICS_ENABLED or not (METRICS_TOKEN or METRICS_PUBLIC):
+        raise HTTPException(status_code=404)
+    if METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=401)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc: HTTPException):
     """
@@ -0,0 +1,44 @@
+# Cấu hình chung cho test: database SQLite tạm, client đã đăng nhập
+import os
+import tempfile
+
+import pytest
+
+# Database và thư mục cache tạm phải được cấu hình trước khi import app
+_tmp_dir = tempfile.mkdtemp(prefix="todo_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/test.db"
+os.environ["TEMPLATE_CACHE_DIR"] = os.path.join(_tmp_dir, "jinja_cache")
+os.environ["SCHEDULER_ENABLED"] = "0"
+
+from fastapi.testclient import TestClient
+
+import main
+from app.database import SessionLocal
+from app.models import User
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    TestClient đã đăng nhập bằng user "tester"
+    """
+    with TestClient(main.app) as test_client:
+        test_client.post("/register", data={
+            "username": "tester", "email": "tester@example.com", "password": "secret-password"
+        })
+        response = test_client.post(
+            "/login", data={"username": "tester", "password": "secret-password"}, follow_redirects=False
+        )
+        assert response.status_code == 303
+        yield test_client
+
+@pytest.fixture()
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture()
+def user(client, db) -> User:
+    return db.query(User).filter(User.username == "tester").one()
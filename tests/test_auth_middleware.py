@@ -0,0 +1,25 @@
+# Request chưa đăng nhập: API client nhận 401 JSON, trang HTML được redirect về login
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+@pytest.fixture()
+def anonymous():
+    return TestClient(main.app)
+
+@pytest.mark.parametrize("path, headers", [
+    ("/api/tasks", {}),
+    ("/tasks", {"Accept": "application/json"}),
+    ("/dashboard", {"Authorization": "Bearer invalid"}),
+])
+def test_api_requests_get_401_json(anonymous, path, headers):
+    response = anonymous.get(path, headers=headers, follow_redirects=False)
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Could not validate credentials"}
+    assert response.headers["www-authenticate"] == "Bearer"
+
+def test_html_pages_redirect_to_login(anonymous):
+    response = anonymous.get("/tasks", headers={"Accept": "text/html"}, follow_redirects=False)
+    assert response.status_code == 303
+    assert response.headers["location"] == "/login"
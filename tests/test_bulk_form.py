@@ -0,0 +1,19 @@
+# Thao tác hàng loạt qua form HTML: dữ liệu không hợp lệ được báo bằng redirect kèm thông báo
+from urllib.parse import unquote
+
+import pytest
+
+from app.controllers.tasks import MAX_BULK_TASKS
+
+@pytest.mark.parametrize("data, message", [
+    ({"action": "move", "task_ids": [1]}, "Chủ đề không hợp lệ"),
+    ({"action": "move", "task_ids": [1], "subject_id": "999999"}, "Chủ đề không hợp lệ"),
+    ({"action": "label", "task_ids": [1], "label_id": "999999"}, "Nhãn không hợp lệ"),
+    ({"action": "move", "task_ids": [1], "subject_id": "abc"}, "Dữ liệu không hợp lệ"),
+    ({"action": "done", "task_ids": list(range(1, MAX_BULK_TASKS + 2))},
+     f"Tối đa {MAX_BULK_TASKS} công việc mỗi lần"),
+])
+def test_invalid_bulk_form_redirects_with_message(client, data, message):
+    response = client.post("/tasks/bulk", data=data, follow_redirects=False)
+    assert response.status_code == 303
+    assert unquote(response.headers["location"]) == f"/tasks?message={message}"
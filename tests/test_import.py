@@ -0,0 +1,21 @@
+# Import task: file hỏng giữa chừng vẫn trả báo cáo cho các lô đã được commit
+from app.importer import IMPORT_BATCH_SIZE
+from app.models import Task
+
+def test_decode_error_after_committed_batch_returns_partial_report(client, db, user):
+    rows = 3 * IMPORT_BATCH_SIZE
+    content = "title,subject\n" + "".join(f"Nhập thử {index},Import test\n" for index in range(rows))
+    data = content.encode("utf-8") + b"\xff\xfe not utf-8\n"
+
+    response = client.post(
+        "/api/tasks/import", files={"file": ("tasks.csv", data, "text/csv")}
+    )
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] >= IMPORT_BATCH_SIZE
+    assert report["failed"] == 1
+    assert report["errors"][0]["error"] == "File phải được mã hóa UTF-8"
+    assert report["errors"][0]["line"] == report["imported"] + 2
+    stored = db.query(Task).filter(Task.user_id == user.id, Task.title.like("Nhập thử %")).count()
+    assert stored == report["imported"]
@@ -0,0 +1,40 @@
+# Phân trang keyset theo (created_at, id) không bỏ sót / lặp task ở ranh giới trang
+from datetime import datetime
+
+from sqlalchemy import insert, text
+
+from app.models import Subject, Task
+
+def test_cursor_pages_cover_whole_second_ties(client, db, user):
+    db.query(Task).filter(Task.user_id == user.id).delete()
+    subject = Subject(name="Pagination", user_id=user.id)
+    db.add(subject)
+    db.flush()
+
+    # Cùng một thời điểm tròn giây, lưu theo hai định dạng: qua SQLAlchemy
+    # ("... 12:00:00.000000") và như CURRENT_TIMESTAMP ("... 12:00:00")
+    created_at = datetime(2025, 1, 1, 12, 0, 0)
+    db.execute(insert(Task), [
+        {"title": f"Task {i}", "status": "todo", "user_id": user.id,
+         "subject_id": subject.id, "created_at": created_at}
+        for i in range(15)
+    ])
+    for i in range(3):
+        db.execute(text(
+            "INSERT INTO tasks (title, status, user_id, subject_id, created_at) "
+            "VALUES (:title, 'todo', :user_id, :subject_id, '2025-01-01 12:00:00')"
+        ), {"title": f"Raw {i}", "user_id": user.id, "subject_id": subject.id})
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/tasks", params=params).json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen)) == 18
@@ -0,0 +1,47 @@
+# Đợt đăng nhập dồn dập: yêu cầu vượt giới hạn pool bcrypt nhận 503 ngay,
+# các trang khác vẫn được phục vụ trong lúc bcrypt đang chạy
+import asyncio
+import time
+
+import httpx
+from anyio import to_thread
+
+import main
+from app.utils import auth
+from app.utils.password_pool import PasswordHashPool
+
+BCRYPT_SECONDS = 0.3
+
+def _slow_verify(plain_password, hashed_password):
+    time.sleep(BCRYPT_SECONDS)
+    return True
+
+async def _burst(cookies, logins: int):
+    # Threadpool nhỏ hơn số yêu cầu bcrypt được nhận: yêu cầu chờ bcrypt không được giữ thread
+    to_thread.current_default_thread_limiter().total_tokens = 2
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver", cookies=cookies) as http:
+        async def dashboard():
+            # Chờ các request đăng nhập chiếm pool bcrypt trước
+            await asyncio.sleep(0.05)
+            started = time.perf_counter()
+            response = await http.get("/dashboard")
+            return response, time.perf_counter() - started
+
+        login_requests = [
+            http.post("/login", data={"username": "tester", "password": "secret-password"})
+            for _ in range(logins)
+        ]
+        return await asyncio.gather(dashboard(), *login_requests)
+
+def test_login_burst_is_rejected_without_blocking_pages(client, monkeypatch):
+    monkeypatch.setattr(auth, "password_pool", PasswordHashPool(workers=1, queue_size=3))
+    monkeypatch.setattr(auth.pwd_context, "verify", _slow_verify)
+
+    (page, page_seconds), *logins = asyncio.run(_burst(client.cookies, logins=8))
+
+    statuses = sorted(response.status_code for response in logins)
+    assert statuses == [303] * 4 + [503] * 4
+    assert all(response.headers["retry-after"] == "1" for response in logins if response.status_code == 503)
+    assert page.status_code == 200
+    assert page_seconds < BCRYPT_SECONDS
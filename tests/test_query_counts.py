@@ -0,0 +1,51 @@
+# Số câu SQL của các trang chính không được tăng theo số task (không có N+1)
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Subject, Label, Task
+from app.utils.profiler import profile_queries
+
+PAGES = ["/tasks", "/dashboard", "/notifications"]
+# Ít hơn TASK_PAGE_SIZE để mọi task đều được render trên /tasks
+TASK_COUNT = 8
+
+def add_tasks(db, user_id: int, count: int) -> None:
+    """
+    Thêm task, mỗi task một subject / label riêng và hạn chót quá hạn, hôm nay
+    hoặc sắp tới, để mọi quan hệ đều được render
+    """
+    now = datetime.now()
+    for index in range(count):
+        subject = Subject(name=f"Subject {index}", user_id=user_id)
+        label = Label(name=f"Label {index}", color="#DC3545", user_id=user_id)
+        db.add_all([subject, label])
+        db.flush()
+        due_date = [now - timedelta(days=1), now + timedelta(minutes=1), now + timedelta(days=2)][index % 3]
+        db.add(Task(
+            title=f"Task {index}", note="note", status="todo", due_date=due_date,
+            user_id=user_id, subject_id=subject.id, label_id=label.id
+        ))
+    db.commit()
+
+def count_statements(client, path: str) -> int:
+    # Request đầu nạp các cache (refdata, bộ đếm), chỉ đo request thứ hai
+    assert client.get(path).status_code == 200
+    with profile_queries() as profile:
+        response = client.get(path)
+    assert response.status_code == 200
+    profile.assert_budget(allow_n_plus_one=False)
+    return profile.count
+
+@pytest.mark.parametrize("path", PAGES)
+def test_statement_count_does_not_grow_with_tasks(client, db, user, path):
+    db.query(Task).filter(Task.user_id == user.id).delete()
+    db.commit()
+
+    add_tasks(db, user.id, TASK_COUNT)
+    with_n_tasks = count_statements(client, path)
+
+    add_tasks(db, user.id, TASK_COUNT)
+    with_2n_tasks = count_statements(client, path)
+
+    assert with_2n_tasks == with_n_tasks
@@ -0,0 +1,38 @@
+# Cập nhật task bị lỗi: client JSON nhận 500, form HTML được render lại trang sửa
+import pytest
+
+from app.controllers import tasks as tasks_controller
+from app.models import Subject, Task
+
+@pytest.fixture()
+def task(db, user) -> Task:
+    subject = Subject(name="Update test", user_id=user.id)
+    db.add(subject)
+    db.flush()
+    task = Task(title="Before", status="todo", user_id=user.id, subject_id=subject.id)
+    db.add(task)
+    db.commit()
+    return task
+
+@pytest.fixture()
+def failing_update(monkeypatch):
+    def fail(task):
+        raise RuntimeError("scheduler down")
+    monkeypatch.setattr(tasks_controller.due_scheduler, "schedule_task", fail)
+
+def form(task: Task) -> dict:
+    return {"title": "After", "subject_id": task.subject_id, "status": "todo"}
+
+def test_json_update_error_returns_500(client, task, failing_update):
+    response = client.post(
+        f"/tasks/{task.id}/edit", data=form(task), headers={"Accept": "application/json"}
+    )
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Có lỗi xảy ra khi cập nhật công việc"}
+
+def test_form_update_error_renders_edit_page(client, task, failing_update):
+    response = client.post(
+        f"/tasks/{task.id}/edit", data=form(task), headers={"Accept": "text/html"}
+    )
+    assert response.status_code == 200
+    assert "Có lỗi xảy ra khi cập nhật công việc" in response.text